@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for the DOCA simulator command lookup.
+
+Times a simulated student session (known-command check followed by the
+next-occurrence lookup, once per cell) against scenarios ranging from the
+size of the shipped Lab 3 CSV up to 100k rows. The indexed lookup should
+stay flat; the linear scan it replaced grows with the scenario.
+
+Usage:
+    python benchmarks/bench_command_index.py [--cells N] [--sizes 89,1000,...]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from command_index import build_command_index, find_next  # noqa: E402
+
+DEFAULT_SIZES = [89, 1_000, 10_000, 100_000]
+
+
+def make_scenario(rows: int) -> list[str]:
+    """Build a scenario with repeated commands, like the Lab 3 retry rows."""
+    distinct = max(1, rows // 3)
+    return [f"sudo systemctl start service-{i % distinct}" for i in range(rows)]
+
+
+def linear_lookup(commands: list[str], command: str, start: int):
+    """The per-cell scan the simulator used before the index."""
+    if command not in commands:
+        return None
+    for idx in range(start, len(commands)):
+        if commands[idx] == command:
+            return idx
+    return commands.index(command)
+
+
+def indexed_lookup(index: dict, command: str, start: int):
+    if command not in index:
+        return None
+    return find_next(index, command, start)
+
+
+def time_session(lookup, table, cells: list[str]) -> float:
+    """Return mean microseconds per cell for a session of `cells`."""
+    current = 0
+    start = time.perf_counter()
+    for command in cells:
+        idx = lookup(table, command, current)
+        if idx is not None:
+            current = idx + 1
+    return (time.perf_counter() - start) / len(cells) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulator command lookup")
+    parser.add_argument("--cells", type=int, default=200, help="Cells per simulated session (default: 200)")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated scenario sizes in rows")
+    parser.add_argument("--skip-linear", action="store_true", help="Only time the indexed lookup")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'rows':>8}  {'build ms':>9}  {'indexed us/cell':>16}  {'linear us/cell':>15}")
+    print("-" * 56)
+    for rows in (int(s) for s in args.sizes.split(",")):
+        commands = make_scenario(rows)
+        # Mostly scenario commands, with some unrelated cells mixed in
+        cells = [rng.choice(commands) if rng.random() < 0.8 else "print('hello')"
+                 for _ in range(args.cells)]
+
+        start = time.perf_counter()
+        index = build_command_index(commands)
+        build_ms = (time.perf_counter() - start) * 1e3
+
+        indexed = time_session(indexed_lookup, index, cells)
+        linear = "-" if args.skip_linear else f"{time_session(linear_lookup, commands, cells):.2f}"
+        print(f"{rows:>8}  {build_ms:>9.2f}  {indexed:>16.2f}  {linear:>15}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark for simulator command matching.
+
+Times CommandMatcher.resolve() for exact, normalized and sudo-insensitive
+inputs, and suggest() for near misses, on scenarios with thousands of
+distinct commands. All of them should stay well under a millisecond.
+
+Usage:
+    python benchmarks/bench_command_match.py [--queries N] [--sizes 100,1000,...]
+"""
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from command_match import CommandMatcher  # noqa: E402
+
+DEFAULT_SIZES = [100, 1_000, 5_000, 10_000]
+
+TEMPLATES = [
+    "sudo systemctl restart service-{i}",
+    "apt install -y package-{i} mlnx-tool-{i}",
+    "dpkg -i doca-host_{i}.0-ubuntu2204_amd64.deb",
+    "mlxconfig -d /dev/mst/mt41692_pciconf{i} q",
+    "sudo minicom -D /dev/rshim{i}/console",
+]
+
+
+def make_commands(count: int) -> list[str]:
+    return [TEMPLATES[i % len(TEMPLATES)].format(i=i) for i in range(count)]
+
+
+def typo(command: str, rng: random.Random) -> str:
+    """Drop one character from a random token."""
+    tokens = command.split()
+    t = rng.randrange(len(tokens))
+    if len(tokens[t]) > 3:
+        k = rng.randrange(len(tokens[t]))
+        tokens[t] = tokens[t][:k] + tokens[t][k + 1:]
+    return " ".join(tokens)
+
+
+VARIANTS = {
+    "exact": lambda c, rng: c,
+    "normalized": lambda c, rng: "  " + c.replace(" -", "  –", 1) + " ",
+    "sudo toggled": lambda c, rng: c[5:] if c.startswith("sudo ") else "sudo " + c,
+    "suggest (typo)": typo,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulator command matching")
+    parser.add_argument("--queries", type=int, default=500, help="Queries per variant (default: 500)")
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Comma-separated numbers of distinct commands")
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'commands':>9}  {'build ms':>9}  " + "  ".join(f"{name + ' us':>17}" for name in VARIANTS))
+    print("-" * (22 + 19 * len(VARIANTS)))
+    for size in (int(s) for s in args.sizes.split(",")):
+        commands = make_commands(size)
+
+        start = time.perf_counter()
+        matcher = CommandMatcher(commands)
+        build_ms = (time.perf_counter() - start) * 1e3
+        # Build the n-gram index up front so it is not timed as a query
+        matcher.suggest(commands[0])
+
+        row = []
+        for name, variant in VARIANTS.items():
+            queries = [variant(rng.choice(commands), rng) for _ in range(args.queries)]
+            lookup = matcher.suggest if name.startswith("suggest") else matcher.resolve
+            start = time.perf_counter()
+            for query in queries:
+                lookup(query)
+            row.append((time.perf_counter() - start) / len(queries) * 1e6)
+        print(f"{size:>9}  {build_ms:>9.2f}  " + "  ".join(f"{us:>17.2f}" for us in row))
+
+
+if __name__ == "__main__":
+    main()
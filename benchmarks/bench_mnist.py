@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Lab 2 MNIST workloads.
+
+Runs the code paths of materials/train.py and materials/test.py on a
+synthetic MNIST-shaped dataset, so no download or trained weights are
+needed:
+
+    train     training throughput through train.train() (samples/s)
+    latency   single-image prediction through test.test_image() (ms)
+    inference batched prediction through test.test_images() (images/s)
+    loading   per-sample transform DataLoader throughput (samples/s)
+
+Each case is warmed up, then measured --repeats times; the median is
+reported. --save-baseline writes the results as JSON and --baseline
+compares against such a file, exiting with status 1 when a case is worse
+than the baseline by more than --tolerance.
+
+Usage:
+    python benchmarks/bench_mnist.py [--suites train,latency,...] [--threads 1,4]
+        [--batch-sizes 64,256] [--workers 0,2] [--amp off,bf16] [--compile none,inductor]
+        [--repeats N] [--warmup N] [--save-baseline FILE | --baseline FILE]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "materials"))
+
+import torch  # noqa: E402
+from torch.utils.data import DataLoader  # noqa: E402
+from torchvision import transforms  # noqa: E402
+
+import model as mnist_model  # noqa: E402
+import test as mnist_test  # noqa: E402
+import train as mnist_train  # noqa: E402
+from mnist_data import MNISTTensors, load_synthetic  # noqa: E402
+
+SUITES = ["train", "latency", "inference", "loading"]
+
+# Samples per training repeat, images per inference repeat
+TRAIN_SAMPLES = 8192
+INFERENCE_IMAGES = 512
+LATENCY_QUERIES = 50
+
+
+class SyntheticMNIST(MNISTTensors):
+    """The first `count` samples of mnist_data's synthetic train split, served like torchvision's MNIST."""
+
+    def __init__(self, count: int, transform=None):
+        data, targets = load_synthetic(True)
+        super().__init__(data[:count], targets[:count], transform)
+
+    def normalized(self) -> tuple[torch.Tensor, torch.Tensor]:
+        """The whole set as train.preload_mnist() would return it."""
+        data = self.data.unsqueeze(1).float().div_(255).sub_(mnist_train.MNIST_MEAN).div_(mnist_train.MNIST_STD)
+        return data.contiguous(), self.targets.clone()
+
+
+def sync(device: torch.device) -> None:
+    if device.type == "cuda":
+        torch.cuda.synchronize()
+
+
+def bench_train(device, batch_size, amp, compile, warmup, repeats) -> list[float]:
+    """Samples/s of train.train() on preloaded synthetic data."""
+    data, targets = SyntheticMNIST(TRAIN_SAMPLES).normalized()
+    loader = mnist_train.PreloadedLoader(data, targets, batch_size=batch_size, shuffle=True)
+    warmup_loader = mnist_train.PreloadedLoader(data[:batch_size * warmup], targets[:batch_size * warmup],
+                                                batch_size=batch_size, shuffle=True)
+    amp_dtype = mnist_train.AMP_DTYPES[amp]
+    scaler = torch.amp.GradScaler(device.type) if amp == "fp16" else None
+    model = mnist_train.Net().to(device)
+    if compile != "none":
+        model, _, _ = mnist_train.compile_model(model, compile, device, batch_size, amp_dtype,
+                                                torch.contiguous_format)
+    optimizer = torch.optim.Adadelta(model.parameters(), lr=1.0)
+
+    mnist_train.train(model, device, warmup_loader, optimizer, 0, amp_dtype=amp_dtype, scaler=scaler,
+                      verbose=False)
+    results = []
+    for epoch in range(1, repeats + 1):
+        loader.set_epoch(epoch)
+        sync(device)
+        start = time.perf_counter()
+        _, samples = mnist_train.train(model, device, loader, optimizer, epoch, amp_dtype=amp_dtype,
+                                       scaler=scaler, verbose=False)
+        sync(device)
+        results.append(samples / (time.perf_counter() - start))
+    return results
+
+
+def write_images(directory: Path, count: int) -> list[str]:
+    dataset = SyntheticMNIST(count)
+    paths = []
+    for i in range(count):
+        path = directory / f"{i}.png"
+        image, _ = dataset[i]
+        image.save(path)
+        paths.append(str(path))
+    return paths
+
+
+def inference_model(device, compile):
+    """test.py's model with random weights; only the speed matters here."""
+    model = mnist_model.Net().eval()
+    if compile != "none":
+        model = torch.jit.script(model)
+    return model.to(device)
+
+
+def bench_latency(device, compile, images, warmup, repeats) -> list[float]:
+    """p50 ms of test.test_image(), per repeat of LATENCY_QUERIES predictions."""
+    model = inference_model(device, compile)
+    for path in images[:warmup]:
+        mnist_test.test_image(model, device, path)
+    results = []
+    for _ in range(repeats):
+        latencies = []
+        for path in images[:LATENCY_QUERIES]:
+            start = time.perf_counter()
+            mnist_test.test_image(model, device, path)
+            latencies.append((time.perf_counter() - start) * 1e3)
+        results.append(statistics.median(latencies))
+    return results
+
+
+def bench_inference(device, batch_size, workers, compile, images, warmup, repeats) -> list[float]:
+    """Images/s of test.test_images(), including decoding."""
+    model = inference_model(device, compile)
+    mnist_test.test_images(model, device, images[:batch_size * max(1, warmup)], batch_size, workers)
+    results = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        mnist_test.test_images(model, device, images, batch_size, workers)
+        results.append(len(images) / (time.perf_counter() - start))
+    return results
+
+
+def bench_loading(batch_size, workers, warmup, repeats) -> list[float]:
+    """Samples/s of a DataLoader with train.py's per-sample transforms."""
+    transform = transforms.Compose([
+        transforms.ToTensor(),
+        transforms.Normalize((mnist_train.MNIST_MEAN,), (mnist_train.MNIST_STD,)),
+    ])
+    loader = DataLoader(SyntheticMNIST(TRAIN_SAMPLES, transform=transform), batch_size=batch_size,
+                        shuffle=True, num_workers=workers, persistent_workers=workers > 0)
+    for _ in itertools.islice(loader, warmup):
+        pass
+    results = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        samples = sum(len(target) for _, target in loader)
+        results.append(samples / (time.perf_counter() - start))
+    return results
+
+
+def run_suites(args, device) -> dict:
+    """Run every selected case; returns {case name: result}."""
+    threads = [int(t) for t in args.threads.split(",")]
+    batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+    workers = [int(w) for w in args.workers.split(",")]
+    amps = args.amp.split(",")
+    compiles = args.compile.split(",")
+    suites = args.suites.split(",")
+
+    results = {}
+
+    def record(name, unit, higher_is_better, values):
+        results[name] = {
+            "median": statistics.median(values),
+            "stdev": statistics.stdev(values) if len(values) > 1 else 0.0,
+            "unit": unit,
+            "higher_is_better": higher_is_better,
+        }
+        print(f"{name:<58} {results[name]['median']:>10.1f} {unit:<9} ± {results[name]['stdev']:.1f}",
+              flush=True)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        images = write_images(Path(tmp), INFERENCE_IMAGES) if {"latency", "inference"} & set(suites) else []
+        for t in threads:
+            torch.set_num_threads(t)
+            if "train" in suites:
+                for bs, amp, comp in itertools.product(batch_sizes, amps, compiles):
+                    record(f"train threads={t} bs={bs} amp={amp} compile={comp}", "samples/s", True,
+                           bench_train(device, bs, amp, comp, args.warmup, args.repeats))
+            if "latency" in suites:
+                for comp in compiles:
+                    record(f"latency threads={t} compile={comp}", "ms", False,
+                           bench_latency(device, comp, images, args.warmup, args.repeats))
+            if "inference" in suites:
+                for bs, w, comp in itertools.product(batch_sizes, workers, compiles):
+                    record(f"inference threads={t} bs={bs} workers={max(1, w)} compile={comp}", "images/s", True,
+                           bench_inference(device, bs, max(1, w), comp, images, args.warmup, args.repeats))
+            if "loading" in suites:
+                for bs, w in itertools.product(batch_sizes, workers):
+                    record(f"loading threads={t} bs={bs} workers={w}", "samples/s", True,
+                           bench_loading(bs, w, args.warmup, args.repeats))
+    return results
+
+
+def environment(device) -> dict:
+    return {
+        "device": str(device),
+        "gpu": torch.cuda.get_device_name() if device.type == "cuda" else None,
+        "cpu_count": os.cpu_count(),
+        "machine": platform.machine(),
+        "torch": torch.__version__,
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """Print each case against the baseline; return the names of regressed cases."""
+    if baseline.get("environment") != results["environment"]:
+        print(f"Warning: baseline was recorded on {baseline.get('environment')}, "
+              f"this run is {results['environment']}")
+    regressions = []
+    print(f"\n{'case':<58} {'baseline':>10} {'now':>10} {'change':>8}")
+    print("-" * 90)
+    for name, now in results["cases"].items():
+        before = baseline.get("cases", {}).get(name)
+        if before is None:
+            print(f"{name:<58} {'-':>10} {now['median']:>10.1f} {'new':>8}")
+            continue
+        change = now["median"] / before["median"] - 1
+        # Positive means better, whichever direction the unit goes
+        gain = change if now["higher_is_better"] else -change
+        flag = ""
+        if gain < -tolerance:
+            flag = "  REGRESSION"
+            regressions.append(name)
+        print(f"{name:<58} {before['median']:>10.1f} {now['median']:>10.1f} {change:>+8.1%}{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Lab 2 MNIST training and inference paths")
+    parser.add_argument("--suites", default=",".join(SUITES), help=f"Comma-separated subset of {SUITES}")
+    parser.add_argument("--device", default="cuda" if torch.cuda.is_available() else "cpu",
+                        help="Device to benchmark (default: cuda if available)")
+    parser.add_argument("--threads", default=str(torch.get_num_threads()),
+                        help="Comma-separated intra-op thread counts (default: torch default)")
+    parser.add_argument("--batch-sizes", default="64", help="Comma-separated batch sizes (default: 64)")
+    parser.add_argument("--workers", default="0,2", help="Comma-separated loader/decoder workers (default: 0,2)")
+    parser.add_argument("--amp", default="off", help="Comma-separated --amp modes for training (default: off)")
+    parser.add_argument("--compile", default="none",
+                        help="Comma-separated compile backends, 'none' or e.g. inductor,torchscript (default: none)")
+    parser.add_argument("--warmup", type=int, default=5, help="Warm-up batches or queries per case (default: 5)")
+    parser.add_argument("--repeats", type=int, default=5, help="Measured repeats per case (default: 5)")
+    parser.add_argument("--save-baseline", metavar="FILE", help="Write the results to FILE as a baseline")
+    parser.add_argument("--baseline", metavar="FILE", help="Compare against a baseline written by --save-baseline")
+    parser.add_argument("--tolerance", type=float, default=0.10,
+                        help="Allowed slowdown against the baseline before failing (default: 0.10)")
+    args = parser.parse_args()
+
+    device = torch.device(args.device)
+    results = {"environment": environment(device), "cases": run_suites(args, device)}
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        print(f"\nBaseline written to {args.save_baseline}")
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\nNo regressions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark for the DOCA simulator scenario store.
+
+Compares the cold-start cost of loading the Lab 3 scenario with
+load_machine() from the CSV and from its compiled memory-mapped form, and
+the previous pandas path. The simulator paths also time the first cell,
+which builds the command matcher. Each measurement
+runs in a fresh interpreter so import caches and RSS are not shared.
+
+Usage:
+    python benchmarks/bench_scenario_startup.py [--repeat N] [--scenario FILE]
+"""
+
+import argparse
+import csv
+import json
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = ROOT_DIR / "scripts"
+DEFAULT_SCENARIO = ROOT_DIR / "dpu simulator" / "doca_installation_commands.csv"
+
+# Each probe prints {"import_s", "load_s", "rss_kb"} as JSON, plus
+# "first_s" for the simulator paths: resolving and dispatching the first
+# cell, which builds the command matcher
+PROBES = {
+    "scenario_store": """
+import resource, sys, time, json
+sys.path.insert(0, {scripts!r})
+t0 = time.perf_counter()
+import scenario_store
+t1 = time.perf_counter()
+machine = scenario_store.load_machine({plain!r})
+t2 = time.perf_counter()
+machine.step(machine.initial, machine.matcher.resolve({first!r}))
+t3 = time.perf_counter()
+print(json.dumps({{"import_s": t1 - t0, "load_s": t2 - t1, "first_s": t3 - t2,
+                  "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+""",
+    "compiled_mmap": """
+import resource, sys, time, json
+sys.path.insert(0, {scripts!r})
+t0 = time.perf_counter()
+import scenario_store
+t1 = time.perf_counter()
+machine = scenario_store.load_machine({compiled!r})
+t2 = time.perf_counter()
+assert type(machine.rows).__name__ == "MappedScenario", "compiled form was not used"
+machine.step(machine.initial, machine.matcher.resolve({first!r}))
+t3 = time.perf_counter()
+print(json.dumps({{"import_s": t1 - t0, "load_s": t2 - t1, "first_s": t3 - t2,
+                  "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+""",
+    "pandas": """
+import resource, sys, time, json
+t0 = time.perf_counter()
+import pandas as pd
+t1 = time.perf_counter()
+df = pd.read_csv({path!r})
+df['Command_Clean'] = df['Command'].astype(str).str.strip()
+t2 = time.perf_counter()
+print(json.dumps({{"import_s": t1 - t0, "load_s": t2 - t1,
+                  "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss}}))
+""",
+}
+
+
+def first_command(path: Path) -> str:
+    with open(path, newline="", encoding="utf-8") as f:
+        return next(csv.DictReader(f))["Command"].strip()
+
+
+def run_probe(name: str, path: Path, plain: Path, compiled: Path, first: str) -> dict | None:
+    code = PROBES[name].format(scripts=str(SCRIPTS_DIR), path=str(path), plain=str(plain),
+                               compiled=str(compiled), first=first)
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    if result.returncode != 0:
+        return None
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark simulator scenario startup")
+    parser.add_argument("--repeat", type=int, default=5, help="Fresh interpreters per probe (default: 5)")
+    parser.add_argument("--scenario", type=Path, default=DEFAULT_SCENARIO, help="Scenario CSV to load")
+    args = parser.parse_args()
+
+    # load_machine() picks the .scn next to a CSV when it is fresh, so each
+    # simulator path gets its own copy: one left plain, one compiled
+    tmp_dir = tempfile.TemporaryDirectory()
+    plain = Path(tmp_dir.name) / "plain" / "scenario.csv"
+    compiled = Path(tmp_dir.name) / "compiled" / "scenario.csv"
+    for copy in (plain, compiled):
+        copy.parent.mkdir()
+        shutil.copyfile(args.scenario, copy)
+    # Compile in a child process too: ru_maxrss survives fork/exec on Linux,
+    # so a large compile here would inflate every probe's RSS
+    compile_code = (f"import sys; sys.path.insert(0, {str(SCRIPTS_DIR)!r}); import scenario_store; "
+                    f"scenario_store.compile_scenario({str(compiled)!r})")
+    subprocess.run([sys.executable, "-c", compile_code], check=True)
+    first = first_command(args.scenario)
+
+    print(f"{'path':<16}  {'import ms':>10}  {'load ms':>9}  {'first cell ms':>14}  {'max RSS MB':>11}")
+    print("-" * 68)
+    for name in PROBES:
+        runs = [run_probe(name, args.scenario, plain, compiled, first) for _ in range(args.repeat)]
+        runs = [r for r in runs if r]
+        if not runs:
+            print(f"{name:<16}  (not available in this environment)")
+            continue
+        import_ms = statistics.median(r["import_s"] for r in runs) * 1e3
+        load_ms = statistics.median(r["load_s"] for r in runs) * 1e3
+        first_ms = f"{statistics.median(r['first_s'] for r in runs) * 1e3:.2f}" if "first_s" in runs[0] else "-"
+        rss_mb = statistics.median(r["rss_kb"] for r in runs) / 1024
+        print(f"{name:<16}  {import_ms:>10.1f}  {load_ms:>9.2f}  {first_ms:>14}  {rss_mb:>11.1f}")
+    tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+from concurrent.futures import ThreadPoolExecutor
+import json
+import time
+import argparse
+import urllib.request
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Send images to serve.py and report cold and warm latency.')
+    parser.add_argument('inputs', nargs='*', default=['7.png'], metavar='input_file',
+                        help='Image files to classify (default: 7.png)')
+    parser.add_argument('--url', default='http://127.0.0.1:8000', help='Server address (default: http://127.0.0.1:8000)')
+    parser.add_argument('--repeat', type=int, default=20,
+                        help='Warm requests per image after the first one (default: 20)')
+    parser.add_argument('--concurrency', type=int, default=1,
+                        help='Requests in flight at once; above 1 the server batches them (default: 1)')
+    return parser.parse_args(argv)
+
+def predict(url, data):
+    """POST one image; returns (prediction, round-trip seconds)."""
+    request = urllib.request.Request(f'{url}/predict', data=data, headers={'Content-Type': 'application/octet-stream'})
+    start = time.perf_counter()
+    with urllib.request.urlopen(request) as response:
+        result = json.load(response)
+    return result['prediction'], time.perf_counter() - start
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+def main(args):
+    with urllib.request.urlopen(f'{args.url}/health') as response:
+        health = json.load(response)
+    images = []
+    for path in args.inputs:
+        with open(path, 'rb') as f:
+            images.append((path, f.read()))
+
+    # The first request is the one a fresh client pays for; the server
+    # itself paid its startup once, before any client connected
+    prediction, cold = predict(args.url, images[0][1])
+    print(f'{images[0][0]}: {prediction}')
+
+    warm = []
+    work = [data for _, data in images for _ in range(args.repeat)]
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for _, seconds in pool.map(lambda data: predict(args.url, data), work):
+            warm.append(seconds)
+    wall = time.perf_counter() - wall_start
+    for path, data in images[1:]:
+        print(f'{path}: {predict(args.url, data)[0]}')
+
+    print(f'Device : {health["device"]}')
+    print(f'Startup : {health["startup_seconds"]:.2f} seconds (server load and warm-up, paid once)')
+    print(f'Cold : {cold * 1000:.2f} ms (first request)')
+    if warm:
+        print(f'Warm : p50 {percentile(warm, 50) * 1000:.2f} ms, p99 {percentile(warm, 99) * 1000:.2f} ms '
+              f'over {len(warm)} requests')
+        print(f'Throughput : {len(warm) / wall:.1f} requests/sec (concurrency {args.concurrency})')
+
+if __name__ == "__main__":
+    main(parse_args())
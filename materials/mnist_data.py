@@ -0,0 +1,122 @@
+import torch
+from PIL import Image
+from torch.utils.data import Dataset
+from torchvision import datasets
+import gzip
+import os
+import shutil
+import struct
+import argparse
+
+# MNIST data sources for train.py. Every source returns the same shapes:
+# uint8 images [N, 28, 28] and int64 labels [N].
+
+# Compressed copy of the MNIST IDX files, written by `python mnist_data.py
+# --bundle`. It only exists once someone has run that and committed it.
+BUNDLE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'mnist')
+IDX_FILES = {
+    True: ('train-images-idx3-ubyte.gz', 'train-labels-idx1-ubyte.gz'),
+    False: ('t10k-images-idx3-ubyte.gz', 't10k-labels-idx1-ubyte.gz'),
+}
+
+# 'auto' uses the bundled copy when it is there, and downloads otherwise
+DATA_SOURCES = ('auto', 'download', 'bundled', 'synthetic')
+
+# Synthetic splits are the size of the real ones
+SPLIT_SIZES = {True: 60000, False: 10000}
+
+def bundle_available(bundle_dir=BUNDLE_DIR):
+    return all(os.path.exists(os.path.join(bundle_dir, name)) for names in IDX_FILES.values() for name in names)
+
+def resolve_source(source):
+    if source == 'auto':
+        return 'bundled' if bundle_available() else 'download'
+    return source
+
+def read_idx(path):
+    """Read a gzipped IDX file of unsigned bytes into a uint8 tensor."""
+    with gzip.open(path, 'rb') as f:
+        data = f.read()
+    zero, dtype, ndim = struct.unpack_from('>HBB', data)
+    if zero != 0 or dtype != 0x08:
+        raise ValueError(f'{path} is not an unsigned byte IDX file')
+    shape = struct.unpack_from(f'>{ndim}I', data, 4)
+    return torch.frombuffer(bytearray(data), dtype=torch.uint8, offset=4 + 4 * ndim).reshape(shape)
+
+def load_download(train, root='data'):
+    raw = datasets.MNIST(root=root, train=train, download=True)
+    return raw.data, raw.targets
+
+def load_bundled(train, bundle_dir=BUNDLE_DIR):
+    if not bundle_available(bundle_dir):
+        raise FileNotFoundError(f'no bundled MNIST copy in {bundle_dir}; create it with '
+                                '"python mnist_data.py --bundle" on a machine with network access, '
+                                'or use --data-source download or synthetic')
+    images, labels = (os.path.join(bundle_dir, name) for name in IDX_FILES[train])
+    return read_idx(images), read_idx(labels).long()
+
+def load_synthetic(train, seed=0):
+    """
+    Deterministic digit-like data: each class is a fixed random pattern
+    blended with per-sample noise, so a model can still learn it and
+    accuracy stays meaningful in offline runs.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    templates = torch.randint(0, 256, (10, 28, 28), dtype=torch.uint8, generator=generator)
+    # Separate streams, so the test split is not a copy of the train split
+    generator.manual_seed(seed + (1 if train else 2))
+    count = SPLIT_SIZES[train]
+    targets = torch.randint(0, 10, (count,), generator=generator)
+    noise = torch.randint(0, 256, (count, 28, 28), dtype=torch.uint8, generator=generator)
+    data = (templates[targets].float() * 0.7 + noise.float() * 0.3).to(torch.uint8)
+    return data, targets
+
+def load_mnist(source, train):
+    """(images, labels) for one split from `source`, one of DATA_SOURCES."""
+    source = resolve_source(source)
+    if source == 'download':
+        return load_download(train)
+    if source == 'bundled':
+        return load_bundled(train)
+    if source == 'synthetic':
+        return load_synthetic(train)
+    raise ValueError(f'unknown data source {source!r}')
+
+class MNISTTensors(Dataset):
+    """
+    Per-sample dataset over load_mnist() tensors. Like torchvision's MNIST,
+    each item is a PIL image passed through `transform`, and a label.
+    """
+    def __init__(self, data, targets, transform=None):
+        self.data = data
+        self.targets = targets
+        self.transform = transform
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, index):
+        image = Image.fromarray(self.data[index].numpy())
+        if self.transform is not None:
+            image = self.transform(image)
+        return image, int(self.targets[index])
+
+def bundle(bundle_dir=BUNDLE_DIR, root='data'):
+    """Download MNIST once and copy its compressed IDX files into the materials."""
+    for train in (True, False):
+        load_download(train, root)
+    os.makedirs(bundle_dir, exist_ok=True)
+    raw_dir = os.path.join(root, 'MNIST', 'raw')
+    for names in IDX_FILES.values():
+        for name in names:
+            shutil.copyfile(os.path.join(raw_dir, name), os.path.join(bundle_dir, name))
+    print(f'Bundled MNIST into {bundle_dir}')
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Prepare the bundled MNIST copy used by train.py --data-source bundled')
+    parser.add_argument('--bundle', action='store_true', help=f'Download MNIST and copy it into {BUNDLE_DIR}')
+    args = parser.parse_args()
+    if args.bundle:
+        bundle()
+    else:
+        print(f'Bundled copy {"present" if bundle_available() else "missing"} in {BUNDLE_DIR}')
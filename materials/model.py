@@ -0,0 +1,61 @@
+import torch
+from torch import nn
+from torchvision import transforms
+import os
+import time
+
+# The MNIST network and weights shared by test.py and serve.py
+
+# Trained weights from train.py, and the cached TorchScript model built from them
+WEIGHTS_PATH = "mnist_cnn.pt"
+TORCHSCRIPT_PATH = "mnist_cnn.ts"
+
+# Same preprocessing as during training
+TRANSFORM = transforms.Compose([
+    transforms.Resize((28, 28)),
+    transforms.ToTensor(),
+    transforms.Normalize((0.1307,), (0.3081,))
+])
+
+class Net(nn.Module):
+    def __init__(self):
+        super(Net, self).__init__()
+        self.conv1 = nn.Conv2d(1, 32, 3, 1)
+        self.conv2 = nn.Conv2d(32, 64, 3, 1)
+        self.fc1 = nn.Linear(9216, 128)
+        self.fc2 = nn.Linear(128, 10)
+
+    def forward(self, x):
+        x = self.conv1(x)
+        x = nn.functional.relu(x)
+        x = self.conv2(x)
+        x = nn.functional.relu(x)
+        x = nn.functional.max_pool2d(x, 2)
+        x = torch.flatten(x, 1)
+        x = self.fc1(x)
+        x = nn.functional.relu(x)
+        x = self.fc2(x)
+        output = nn.functional.log_softmax(x, dim=1)
+        return output
+    
+def load_model(device, compile=False):
+    if not compile:
+        # Load the trained model (use map_location to handle CPU/GPU compatibility)
+        model = Net().to(device)
+        model.load_state_dict(torch.load(WEIGHTS_PATH, map_location=device))
+        return model
+
+    # Reuse the compiled model unless the weights have changed since it was saved
+    start = time.time()
+    if os.path.exists(TORCHSCRIPT_PATH) and os.path.getmtime(TORCHSCRIPT_PATH) >= os.path.getmtime(WEIGHTS_PATH):
+        model = torch.jit.load(TORCHSCRIPT_PATH, map_location=device)
+        source = 'cached'
+    else:
+        net = Net()
+        net.load_state_dict(torch.load(WEIGHTS_PATH, map_location='cpu'))
+        scripted = torch.jit.script(net.eval())
+        torch.jit.save(scripted, TORCHSCRIPT_PATH)
+        model = scripted.to(device)
+        source = 'scripted'
+    print(f'Compile : {time.time() - start:.2f} seconds ({source})')
+    return model.eval()
@@ -0,0 +1,154 @@
+import torch
+from PIL import Image
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from concurrent.futures import Future
+import io
+import json
+import queue
+import threading
+import time
+import argparse
+
+from model import TRANSFORM, load_model
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Serve MNIST predictions from a model kept loaded and warm.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on (default: 127.0.0.1)')
+    parser.add_argument('--port', type=int, default=8000, help='Port to listen on (default: 8000)')
+    parser.add_argument('--compile', action='store_true',
+                        help='Serve the cached TorchScript model, as in test.py --compile')
+    parser.add_argument('--max-batch', type=int, default=32,
+                        help='Most requests run in one forward pass (default: 32)')
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help='How long the first request in a batch waits for others to join (default: 2)')
+    return parser.parse_args(argv)
+
+class MicroBatcher:
+    """
+    Runs concurrent requests through the model together. submit() queues
+    an image tensor and returns a Future; a single worker thread takes the
+    first queued image, gathers whatever else arrives within max_wait or
+    up to max_batch, and answers them with one forward pass.
+    """
+
+    def __init__(self, model, device, max_batch, max_wait):
+        self.model = model
+        self.device = device
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.queue = queue.Queue()
+        self.batches = 0
+        self.requests = 0
+        self.worker = threading.Thread(target=self._run, daemon=True)
+        self.worker.start()
+
+    def submit(self, image):
+        future = Future()
+        self.queue.put((image, future))
+        return future
+
+    def _collect(self):
+        batch = [self.queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            try:
+                batch.append(self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            try:
+                with torch.inference_mode():
+                    output = self.model(torch.stack([image for image, _ in batch]).to(self.device))
+                    predictions = output.argmax(dim=1).tolist()
+            except Exception as e:
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.requests += len(batch)
+            for (_, future), prediction in zip(batch, predictions):
+                future.set_result(prediction)
+
+def warm_up(model, device, max_batch):
+    """Run every batch size once so first requests don't pay for kernel selection and allocation."""
+    with torch.inference_mode():
+        for size in range(1, max_batch + 1):
+            model(torch.zeros(size, 1, 28, 28, device=device))
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+
+class PredictHandler(BaseHTTPRequestHandler):
+    """POST /predict with an image file as the body; GET /health for server stats."""
+    server_version = 'MNISTServe/1.0'
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path != '/health':
+            self._reply(404, {'error': f'unknown path {self.path}'})
+            return
+        batcher = self.server.batcher
+        self._reply(200, {'device': str(self.server.device),
+                          'startup_seconds': self.server.startup_seconds,
+                          'requests': batcher.requests,
+                          'batches': batcher.batches})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._reply(404, {'error': f'unknown path {self.path}'})
+            return
+        start = time.perf_counter()
+        try:
+            data = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            with Image.open(io.BytesIO(data)) as image:
+                tensor = TRANSFORM(image.convert('L'))
+        except (OSError, ValueError) as e:
+            self._reply(400, {'error': f'cannot decode image: {e}'})
+            return
+        try:
+            prediction = self.server.batcher.submit(tensor).result()
+        except Exception as e:
+            # The model failed on this request's batch; answer instead of dropping the connection
+            self._reply(500, {'error': f'prediction failed: {e}'})
+            return
+        self._reply(200, {'prediction': prediction,
+                          'server_ms': (time.perf_counter() - start) * 1000})
+
+    def log_message(self, format, *args):
+        # One log line per request would dominate the measurements
+        pass
+
+def main(args):
+    start_time = time.time()
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    model = load_model(device, args.compile).eval()
+    warm_up(model, device, args.max_batch)
+    startup_seconds = time.time() - start_time
+
+    server = ThreadingHTTPServer((args.host, args.port), PredictHandler)
+    server.device = device
+    server.startup_seconds = startup_seconds
+    server.batcher = MicroBatcher(model, device, args.max_batch, args.max_wait_ms / 1000)
+    print(f'Device : {device}')
+    print(f'Startup : {startup_seconds:.2f} seconds (load and warm-up)')
+    print(f'Serving on http://{args.host}:{args.port} (POST /predict, GET /health)', flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main(parse_args())
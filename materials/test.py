@@ -1,77 +1,176 @@
 import torch
-from torch import nn
-from torch.utils.data import DataLoader
-from torchvision import datasets, transforms
 from PIL import Image
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from itertools import islice
+import glob
+import json
+import os
 import time
 import argparse 
 
-parser = argparse.ArgumentParser(description='The program will recognize numerals from image files.')
-parser.add_argument('input_file', nargs='?', default='7.png', help='Input image file (default: 7.png')
-args = parser.parse_args()
-
-print(f'Processing file: {args.input_file}')
-
-
-class Net(nn.Module):
-    def __init__(self):
-        super(Net, self).__init__()
-        self.conv1 = nn.Conv2d(1, 32, 3, 1)
-        self.conv2 = nn.Conv2d(32, 64, 3, 1)
-        self.fc1 = nn.Linear(9216, 128)
-        self.fc2 = nn.Linear(128, 10)
-
-    def forward(self, x):
-        x = self.conv1(x)
-        x = nn.functional.relu(x)
-        x = self.conv2(x)
-        x = nn.functional.relu(x)
-        x = nn.functional.max_pool2d(x, 2)
-        x = torch.flatten(x, 1)
-        x = self.fc1(x)
-        x = nn.functional.relu(x)
-        x = self.fc2(x)
-        output = nn.functional.log_softmax(x, dim=1)
-        return output
-    
-def test_image(model, image_path):
-    # Load the trained model (use map_location to handle CPU/GPU compatibility)
-    model.load_state_dict(torch.load("mnist_cnn.pt", map_location=device))
-    
-    # Open the image and convert it to grayscale
-    image = Image.open(image_path).convert('L')
-    
-    # Resize the image and apply the same transformations as during training
-    transform = transforms.Compose([
-        transforms.Resize((28, 28)),
-        transforms.ToTensor(),
-        transforms.Normalize((0.1307,), (0.3081,))
-    ])
-    image = transform(image)
-    
+from model import TORCHSCRIPT_PATH, TRANSFORM, load_model
+
+# One JSON record per run is appended here, for scripts/timer.py
+RESULTS_PATH = "results.jsonl"
+
+# Files picked up when a directory is given
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.bmp', '.gif', '.tif', '.tiff')
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='The program will recognize numerals from image files.')
+    parser.add_argument('inputs', nargs='*', default=['7.png'], metavar='input_file',
+                        help='Image files, directories or glob patterns (default: 7.png)')
+    parser.add_argument('--compile', action='store_true',
+                        help=f'Run the TorchScript model cached in {TORCHSCRIPT_PATH}, scripting and caching it '
+                             'first if it is missing or older than the weights')
+    parser.add_argument('--batch-size', type=int, default=64,
+                        help='Images per forward pass (default: 64)')
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help='Threads decoding images (default: number of CPUs)')
+    parser.add_argument('--results', default=RESULTS_PATH, metavar='FILE',
+                        help=f'Append a JSON result record for this run to FILE (default: {RESULTS_PATH}, '
+                             "'' to disable)")
+    return parser.parse_args(argv)
+
+def find_images(inputs):
+    """Expand files, directories and glob patterns into a list of image paths."""
+    paths = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            paths.extend(sorted(os.path.join(pattern, name) for name in os.listdir(pattern)
+                                if name.lower().endswith(IMAGE_EXTENSIONS)))
+        elif glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern))
+            if not matches:
+                print(f'Warning: no files match {pattern}')
+            paths.extend(matches)
+        else:
+            paths.append(pattern)
+    return paths
+
+def load_image(image_path):
+    """Decode one image into a normalized 1x28x28 tensor, or return the error."""
+    try:
+        # Open the image and convert it to grayscale
+        with Image.open(image_path) as image:
+            return TRANSFORM(image.convert('L'))
+    except OSError as e:
+        return e
+
+def test_image(model, device, image_path):
     # Add a batch dimension and move the image to the device
-    image = image.unsqueeze(0).to(device)
-    
+    image = TRANSFORM(Image.open(image_path).convert('L')).unsqueeze(0).to(device)
+
     # Get the model's prediction
-    output = model(image)
-    pred = output.argmax(dim=1).item()
-    
-    return pred
-
-# Start time measurement 
-start_time=time.time()
-
-#image_path = '7.png'
-# Set the device to run on
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-#device=torch.device('cpu')
-
-model = Net().to(device)
-prediction = test_image(model, args.input_file)
-print(f'The predicted number is: {prediction}')
-
-#Time calculation:
-end_time=time.time()
-elapsed_time=end_time-start_time
-print(f'Device : {device}')
-print(f'Time : {elapsed_time:.2f} seconds ')
+    with torch.inference_mode():
+        output = model(image)
+    return output.argmax(dim=1).item()
+
+def test_images(model, device, paths, batch_size, workers):
+    """
+    Classify `paths` in batches while a thread pool decodes ahead.
+    At most two batches are decoded ahead, so memory follows the batch
+    size rather than the number of files.
+    Returns ({path: prediction or error}, per-image latencies in seconds),
+    each measured from queueing the image for decoding to its prediction.
+    """
+    results = {}
+    latencies = []
+    window = 2 * batch_size
+    queued = iter(paths)
+    pending = deque()
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        def top_up():
+            for path in islice(queued, window - len(pending)):
+                pending.append((path, time.perf_counter(), pool.submit(load_image, path)))
+
+        top_up()
+        while pending:
+            batch_paths = []
+            queued_at = []
+            images = []
+            for _ in range(min(batch_size, len(pending))):
+                path, queued_time, future = pending.popleft()
+                image = future.result()
+                if isinstance(image, Exception):
+                    results[path] = image
+                else:
+                    batch_paths.append(path)
+                    queued_at.append(queued_time)
+                    images.append(image)
+            # Queue the next batch before running this one, so decoding overlaps inference
+            top_up()
+            if not images:
+                continue
+            with torch.inference_mode():
+                output = model(torch.stack(images).to(device))
+                # .tolist() waits for the device, so the latency is complete
+                predictions = output.argmax(dim=1).tolist()
+            done = time.perf_counter()
+            latencies.extend(done - t for t in queued_at)
+            results.update(zip(batch_paths, predictions))
+    return results, latencies
+
+def write_result(path, record):
+    """Append one result record as a JSON line."""
+    record = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), **record}
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))]
+
+def main(args):
+    # Start time measurement
+    start_time=time.time()
+
+    # Set the device to run on
+    device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
+    #device=torch.device('cpu')
+
+    paths = find_images(args.inputs)
+    model = load_model(device, args.compile).eval()
+    record = {'kind': 'inference', 'device': device.type, 'images': len(paths)}
+
+    if len(paths) == 1:
+        # Single image: the original one-shot demo
+        print(f'Processing file: {paths[0]}')
+        prediction = test_image(model, device, paths[0])
+        print(f'The predicted number is: {prediction}')
+        record['prediction'] = prediction
+    elif paths:
+        print(f'Processing {len(paths)} files in batches of {args.batch_size}')
+        run_start = time.perf_counter()
+        results, latencies = test_images(model, device, paths, args.batch_size, args.workers)
+        run_seconds = time.perf_counter() - run_start
+        for path in paths:
+            result = results[path]
+            print(f'{path}: error: {result}' if isinstance(result, Exception) else f'{path}: {result}')
+        classified = sum(1 for r in results.values() if not isinstance(r, Exception))
+        # Model load and startup are excluded, so this is the steady-state rate
+        print(f'Throughput : {classified / run_seconds:.1f} images/sec ({classified} images)')
+        record['images_per_sec'] = round(classified / run_seconds, 1)
+        if latencies:
+            print(f'Latency : p50 {percentile(latencies, 50) * 1000:.2f} ms, '
+                  f'p99 {percentile(latencies, 99) * 1000:.2f} ms per image (queued to predicted)')
+            record['latency_p50_ms'] = round(percentile(latencies, 50) * 1000, 3)
+            record['latency_p99_ms'] = round(percentile(latencies, 99) * 1000, 3)
+    else:
+        print('No images to process')
+
+    #Time calculation:
+    end_time=time.time()
+    elapsed_time=end_time-start_time
+    print(f'Device : {device}')
+    print(f'Time : {elapsed_time:.2f} seconds ')
+
+    if args.results and paths:
+        record['seconds'] = round(elapsed_time, 3)
+        record['config'] = {'compile': args.compile, 'batch_size': args.batch_size if len(paths) > 1 else 1}
+        write_result(args.results, record)
+
+if __name__ == "__main__":
+    main(parse_args())
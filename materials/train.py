@@ -1,13 +1,342 @@
 import torch
+import torch.distributed as dist
+import torch.multiprocessing as mp
 from torch import nn
-from torch.utils.data import DataLoader
-from torchvision import datasets, transforms
+from torch.nn.parallel import DistributedDataParallel
+from torch.utils.data import DataLoader, Sampler, TensorDataset
+from torchvision import transforms
+import json
+import os
+import socket
+import threading
 import time
 import argparse
 
-parser = argparse.ArgumentParser(description='Train MNIST digit recognition model')
-parser.add_argument('epochs', nargs='?', type=int, default=1, help='Number of training epochs (default: 1)')
-args = parser.parse_args()
+from mnist_data import DATA_SOURCES, MNISTTensors, load_mnist, resolve_source
+
+# MNIST normalization constants, as used by transforms.Normalize
+MNIST_MEAN = 0.1307
+MNIST_STD = 0.3081
+
+# Autocast dtype per --amp mode
+AMP_DTYPES = {'off': None, 'bf16': torch.bfloat16, 'fp16': torch.float16}
+
+# Compiled inference model written by --compile and loaded by test.py --compile
+TORCHSCRIPT_PATH = "mnist_cnn.ts"
+
+# Full training state written by --checkpoint-every and read by --resume
+CHECKPOINT_PATH = "mnist_checkpoint.pt"
+
+# One JSON record per run is appended here, for scripts/timer.py
+RESULTS_PATH = "results.jsonl"
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description='Train MNIST digit recognition model')
+    parser.add_argument('epochs', nargs='?', type=int, default=1, help='Number of training epochs (default: 1)')
+    parser.add_argument('--data-source', choices=DATA_SOURCES, default='auto',
+                        help='Where MNIST comes from: the torchvision download, a compressed copy in '
+                             'materials/mnist made by mnist_data.py --bundle, or deterministic synthetic '
+                             'digits (default: auto, the bundled copy if present, else download)')
+    parser.add_argument('--preload', action='store_true',
+                        help='Decode and normalize the whole dataset into memory once and serve batches by slicing')
+    parser.add_argument('--preload-cache', metavar='FILE',
+                        help='With --preload, cache the decoded tensors in FILE (.pt) for later runs')
+    # Data loading pipeline; anything left unset is picked by loader_settings()
+    parser.add_argument('--workers', type=int, help='DataLoader worker processes (default: auto)')
+    parser.add_argument('--pin-memory', action=argparse.BooleanOptionalAction,
+                        help='Pin host batches for faster GPU copies (default: on with CUDA)')
+    parser.add_argument('--prefetch-factor', type=int,
+                        help='Batches each worker loads ahead (default: 2 when workers > 0)')
+    parser.add_argument('--persistent-workers', action=argparse.BooleanOptionalAction,
+                        help='Keep workers alive between epochs (default: on with workers and >1 epoch)')
+    parser.add_argument('--non-blocking', action=argparse.BooleanOptionalAction,
+                        help='Overlap host-to-device copies with compute (default: on with pinned memory)')
+    # Mixed precision and memory format
+    parser.add_argument('--amp', choices=AMP_DTYPES, default='off',
+                        help='Autocast precision: bf16 (CPU or recent GPUs), fp16 (GPU tensor cores, '
+                             'uses a grad scaler) or off (default)')
+    parser.add_argument('--channels-last', action='store_true',
+                        help='Use channels_last memory format for the model and input batches')
+    parser.add_argument('--compile', nargs='?', const='inductor', metavar='BACKEND',
+                        help="Compile the model with torch.compile using BACKEND (default: inductor), "
+                             "or 'torchscript'. Falls back to TorchScript if torch.compile fails")
+    # Data-parallel CPU training
+    parser.add_argument('--ddp-cpu', type=int, metavar='N',
+                        help='Train data-parallel across N local CPU processes with the gloo backend. '
+                             'Under torchrun the process count comes from torchrun instead')
+    parser.add_argument('--baseline-sps', type=float, metavar='S',
+                        help='Single-process samples/sec (the Throughput line of a normal run) '
+                             'to report data-parallel scaling efficiency against (default: the latest '
+                             'single-process CPU record with the same options in the results file)')
+    # Checkpointing
+    parser.add_argument('--seed', type=int,
+                        help='Seed for the per-epoch shuffle order (default: random, kept in checkpoints)')
+    parser.add_argument('--checkpoint-every', type=int, metavar='STEPS',
+                        help='Checkpoint the full training state every STEPS steps and at the end of '
+                             'every epoch (0: epoch ends only). Written in the background')
+    parser.add_argument('--checkpoint-path', default=CHECKPOINT_PATH, metavar='FILE',
+                        help=f'Checkpoint file (default: {CHECKPOINT_PATH})')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue from the checkpoint file, mid-epoch if that is where it was taken')
+    # Telemetry
+    parser.add_argument('--telemetry', metavar='FILE',
+                        help='Write per-phase step timings and run phase totals to FILE as JSON Lines')
+    parser.add_argument('--telemetry-every', type=int, default=50, metavar='N',
+                        help='Time every N-th step (default: 50)')
+    parser.add_argument('--results', default=RESULTS_PATH, metavar='FILE',
+                        help=f'Append a JSON result record for this run to FILE (default: {RESULTS_PATH}, '
+                             "'' to disable)")
+    return parser.parse_args(argv)
+
+def autocast(device, amp_dtype):
+    """Autocast context for the device, a no-op when amp_dtype is None."""
+    return torch.autocast(device_type=device.type, dtype=amp_dtype, enabled=amp_dtype is not None)
+
+def warm_up(model, device, batch_size, amp_dtype, memory_format):
+    """
+    Run one training and one evaluation pass on a dummy batch, so that any
+    lazy compilation happens here instead of inside the first epoch.
+    """
+    data = torch.zeros(batch_size, 1, 28, 28, device=device).to(memory_format=memory_format)
+    model.train()
+    with autocast(device, amp_dtype):
+        loss = model(data).float().sum()
+    loss.backward()
+    model.zero_grad(set_to_none=True)
+    model.eval()
+    with torch.no_grad(), autocast(device, amp_dtype):
+        model(data)
+    if device.type == 'cuda':
+        torch.cuda.synchronize()
+
+def compile_model(model, backend, device, batch_size, amp_dtype, memory_format):
+    """
+    Compile `model` and warm it up. Returns (compiled model, backend used,
+    seconds spent). torch.compile fails lazily (e.g. no C compiler for
+    inductor), so the warm-up is what decides whether to fall back.
+    """
+    start = time.time()
+    if backend != 'torchscript':
+        try:
+            compiled = torch.compile(model, backend=backend)
+            warm_up(compiled, device, batch_size, amp_dtype, memory_format)
+            return compiled, backend, time.time() - start
+        except Exception as e:
+            print(f'torch.compile ({backend}) failed, falling back to TorchScript: {e}')
+    compiled = torch.jit.script(model)
+    warm_up(compiled, device, batch_size, amp_dtype, memory_format)
+    return compiled, 'torchscript', time.time() - start
+
+def plain_state_dict(model):
+    """state_dict without the prefixes DDP and torch.compile add, loadable into a plain Net."""
+    return {k.removeprefix('module.').removeprefix('_orig_mod.'): v for k, v in model.state_dict().items()}
+
+def export_torchscript(state_dict, path=TORCHSCRIPT_PATH):
+    """Save a CPU TorchScript copy of the trained model for test.py --compile."""
+    net = Net()
+    net.load_state_dict(state_dict)
+    torch.jit.save(torch.jit.script(net.eval()), path)
+
+def cpu_copy(state):
+    """Copy of nested state with every tensor cloned into CPU memory."""
+    if isinstance(state, torch.Tensor):
+        return state.detach().to('cpu', copy=True)
+    if isinstance(state, dict):
+        return {k: cpu_copy(v) for k, v in state.items()}
+    if isinstance(state, (list, tuple)):
+        return type(state)(cpu_copy(v) for v in state)
+    return state
+
+def training_state(model, optimizer, scaler, epoch, batch, seed):
+    """
+    Everything needed to continue training: resuming runs epoch `epoch`
+    starting after its first `batch` batches.
+    """
+    return cpu_copy({
+        'model': plain_state_dict(model),
+        'optimizer': optimizer.state_dict(),
+        'scaler': scaler.state_dict() if scaler is not None else None,
+        'epoch': epoch,
+        'batch': batch,
+        'seed': seed,
+        'rng': torch.get_rng_state(),
+        'cuda_rng': torch.cuda.get_rng_state_all() if torch.cuda.is_available() else None,
+    })
+
+class AsyncCheckpointer:
+    """
+    Writes checkpoints from a background thread. save() takes a snapshot
+    from training_state() and returns at once; a snapshot still waiting
+    when a newer one arrives is dropped, so a slow disk costs checkpoint
+    frequency rather than training time. Files are replaced atomically.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.pending = None
+        self.closed = False
+        self.written = 0
+        self.condition = threading.Condition()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def save(self, state):
+        with self.condition:
+            self.pending = state
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.pending is None and not self.closed:
+                    self.condition.wait()
+                if self.pending is None:
+                    return
+                state, self.pending = self.pending, None
+            try:
+                torch.save(state, self.path + '.tmp')
+                os.replace(self.path + '.tmp', self.path)
+                self.written += 1
+            except OSError as e:
+                print(f'Checkpoint to {self.path} failed: {e}')
+
+    def close(self):
+        """Finish writing the latest snapshot."""
+        with self.condition:
+            self.closed = True
+            self.condition.notify()
+        self.thread.join()
+
+class Telemetry:
+    """
+    Per-phase step timings written as JSON Lines. Only every `every`-th
+    step is timed, split at mark() calls into h2d, forward, backward and
+    optimizer phases. On CUDA the marks are CUDA events, read back only
+    once the GPU has passed them, so sampling never forces a sync; on CPU
+    the work is synchronous and perf counters are exact. Data wait is
+    always host time spent waiting for the loader.
+    """
+    PHASES = ('h2d_ms', 'forward_ms', 'backward_ms', 'optimizer_ms')
+
+    def __init__(self, path, every, device):
+        self.file = open(path, 'w')
+        self.every = max(1, every)
+        self.cuda = device.type == 'cuda'
+        self.record = None
+        self.marks = []
+        # Sampled steps whose CUDA events may not have completed yet
+        self.pending = []
+
+    def start(self, epoch, batch, data_wait):
+        """Begin step `batch`; timing only happens on sampled steps."""
+        if batch % self.every:
+            self.record = None
+            return
+        self.record = {'event': 'step', 'epoch': epoch, 'batch': batch,
+                       'data_wait_ms': round(data_wait * 1000, 3)}
+        self.marks = []
+        self.mark()
+
+    def mark(self):
+        """End the current phase of a sampled step."""
+        if self.record is None:
+            return
+        if self.cuda:
+            event = torch.cuda.Event(enable_timing=True)
+            event.record()
+            self.marks.append(event)
+        else:
+            self.marks.append(time.perf_counter())
+
+    def end(self, loss):
+        """Close the last phase; the loss is read once it is ready."""
+        if self.record is None:
+            return
+        self.mark()
+        self.pending.append((self.record, self.marks, loss.detach()))
+        self.record = None
+        self.flush(wait=False)
+
+    def flush(self, wait=True):
+        """Write completed samples, or all of them when `wait` is set."""
+        while self.pending:
+            record, marks, loss = self.pending[0]
+            if self.cuda:
+                if not wait and not marks[-1].query():
+                    break
+                marks[-1].synchronize()
+                times = [start.elapsed_time(end) for start, end in zip(marks, marks[1:])]
+            else:
+                times = [(end - start) * 1000 for start, end in zip(marks, marks[1:])]
+            record.update((phase, round(ms, 3)) for phase, ms in zip(self.PHASES, times))
+            record['loss'] = loss.item()
+            self.write(record)
+            self.pending.pop(0)
+
+    def write(self, record):
+        self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+def write_result(path, record):
+    """Append one result record as a JSON line."""
+    record = {'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), **record}
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+def baseline_from_results(path, config):
+    """
+    Samples/sec of the latest single-process CPU training record in `path`
+    whose configuration matches `config` apart from the process count, or None.
+    """
+    wanted = {**config, 'processes': 1}
+    baseline = None
+    try:
+        with open(path) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if (isinstance(record, dict) and record.get('kind') == 'train' and record.get('device') == 'cpu'
+                        and record.get('config') == wanted and record.get('samples_per_sec')):
+                    baseline = record['samples_per_sec']
+    except OSError:
+        return None
+    return baseline
+
+def loader_settings(args, device):
+    """
+    Resolve the data loading options, filling in defaults from the CPU
+    count and device. On CUDA, workers keep the GPU fed while pinned
+    memory lets copies run asynchronously. On CPU, the compute itself
+    uses every core, so only a couple of workers are worth their cost.
+    """
+    cpus = os.cpu_count() or 1
+    cuda = device.type == 'cuda'
+    workers = args.workers
+    if workers is None:
+        workers = min(8, cpus // 2) if cuda else min(2, cpus // 4)
+    pin_memory = cuda if args.pin_memory is None else args.pin_memory
+    non_blocking = pin_memory if args.non_blocking is None else args.non_blocking
+    prefetch_factor = args.prefetch_factor
+    persistent_workers = args.persistent_workers
+    if workers == 0:
+        # DataLoader rejects these without worker processes
+        prefetch_factor = None
+        persistent_workers = False
+    else:
+        if prefetch_factor is None:
+            prefetch_factor = 2
+        if persistent_workers is None:
+            persistent_workers = args.epochs > 1
+    return {
+        'num_workers': workers,
+        'pin_memory': pin_memory,
+        'prefetch_factor': prefetch_factor,
+        'persistent_workers': persistent_workers,
+    }, non_blocking
 
 # Define a simple convolutional neural network
 class Net(nn.Module):
@@ -31,31 +360,178 @@ class Net(nn.Module):
         output = nn.functional.log_softmax(x, dim=1)
         return output
 
+def epoch_order(n, seed, epoch, shuffle=True, num_replicas=1, rank=0):
+    """
+    Sample indices one process visits in one epoch. The order depends only
+    on (seed, epoch), so every process and every resumed run agree on it.
+    Like DistributedSampler, it wraps around to a multiple of num_replicas
+    so all processes run the same number of steps.
+    """
+    if shuffle:
+        order = torch.randperm(n, generator=torch.Generator().manual_seed(seed + epoch))
+    else:
+        order = torch.arange(n)
+    total = -(-n // num_replicas) * num_replicas
+    if total > n:
+        order = torch.cat([order, order[:total - n]])
+    return order[rank::num_replicas]
+
+class ResumableSampler(Sampler):
+    """Sampler over epoch_order() that can start partway into an epoch."""
+    def __init__(self, dataset, seed, num_replicas=1, rank=0):
+        self.dataset = dataset
+        self.seed = seed
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.epoch = 0
+        self.start = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        self.start = 0
+
+    def skip(self, samples):
+        """Leave out the first `samples` samples of the current epoch."""
+        self.start = samples
+
+    def __len__(self):
+        return max(0, -(-len(self.dataset) // self.num_replicas) - self.start)
+
+    def __iter__(self):
+        order = epoch_order(len(self.dataset), self.seed, self.epoch, True, self.num_replicas, self.rank)
+        return iter(order[self.start:].tolist())
+
+# Serve batches straight from in-memory tensors
+class PreloadedLoader:
+    """
+    Batches from already-normalized tensors by index slicing, with no
+    per-sample transforms. Provides the parts of DataLoader that train()
+    and validate() use.
+    """
+    def __init__(self, data, targets, batch_size, shuffle, num_replicas=1, rank=0, seed=0):
+        self.data = data
+        self.targets = targets
+        self.dataset = TensorDataset(data, targets)
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        # Sharded and resumable the same way as ResumableSampler
+        self.num_replicas = num_replicas
+        self.rank = rank
+        self.seed = seed
+        self.epoch = 0
+        self.start = 0
+
+    def set_epoch(self, epoch):
+        self.epoch = epoch
+        self.start = 0
+
+    def skip(self, samples):
+        """Leave out the first `samples` samples of the current epoch."""
+        self.start = samples
+
+    def __len__(self):
+        samples = max(0, -(-len(self.data) // self.num_replicas) - self.start)
+        return (samples + self.batch_size - 1) // self.batch_size
+
+    def __iter__(self):
+        n = len(self.data)
+        if not self.shuffle and self.num_replicas == 1:
+            for start in range(self.start, n, self.batch_size):
+                yield self.data[start:start + self.batch_size], self.targets[start:start + self.batch_size]
+            return
+        order = epoch_order(n, self.seed, self.epoch, self.shuffle, self.num_replicas, self.rank)[self.start:]
+        for start in range(0, len(order), self.batch_size):
+            idx = order[start:start + self.batch_size]
+            yield self.data[idx], self.targets[idx]
+
+def preload_mnist(cache_path=None, source='auto'):
+    """
+    Decode and normalize the full MNIST train and test sets once.
+    Returns {'train': (data, targets), 'test': (data, targets)} with data
+    shaped [N, 1, 28, 28], matching ToTensor() + Normalize().
+    """
+    source = resolve_source(source)
+    if cache_path and os.path.exists(cache_path):
+        tensors = torch.load(cache_path)
+        # A cache built from another source is rebuilt
+        if tensors.get('source', 'download') == source:
+            return tensors
+
+    tensors = {'source': source}
+    for split, train in (('train', True), ('test', False)):
+        images, targets = load_mnist(source, train)
+        data = images.unsqueeze(1).float().div_(255).sub_(MNIST_MEAN).div_(MNIST_STD)
+        tensors[split] = (data.contiguous(), targets.clone())
+
+    if cache_path:
+        torch.save(tensors, cache_path)
+    return tensors
+
 # Define the training function
-def train(model, device, train_loader, optimizer, epoch):
+def train(model, device, train_loader, optimizer, epoch, non_blocking=False,
+          amp_dtype=None, scaler=None, memory_format=torch.contiguous_format, verbose=True,
+          start_batch=0, on_step=None, telemetry=None):
+    """
+    Train for one epoch, or its remainder when resuming after `start_batch`
+    batches. on_step(batches done) is called after every optimizer step.
+    Returns (steps, samples) run by this process.
+    """
     model.train()
-    for batch_idx, (data, target) in enumerate(train_loader):
-        data, target = data.to(device), target.to(device)
+    total_batches = start_batch + len(train_loader)
+    steps = 0
+    samples = 0
+    fetch_start = time.perf_counter()
+    for batch_idx, (data, target) in enumerate(train_loader, start_batch):
+        if telemetry is not None:
+            telemetry.start(epoch, batch_idx, time.perf_counter() - fetch_start)
+        data = data.to(device, non_blocking=non_blocking, memory_format=memory_format)
+        target = target.to(device, non_blocking=non_blocking)
         optimizer.zero_grad()
-        output = model(data)
-        loss = nn.functional.nll_loss(output, target)
-        loss.backward()
-        optimizer.step()
-        if batch_idx % 100 == 0:
+        if telemetry is not None:
+            telemetry.mark()
+        with autocast(device, amp_dtype):
+            output = model(data)
+            loss = nn.functional.nll_loss(output, target)
+        if telemetry is not None:
+            telemetry.mark()
+        if scaler is not None:
+            # fp16 gradients can underflow; the scaler rescales the loss
+            scaler.scale(loss).backward()
+        else:
+            loss.backward()
+        if telemetry is not None:
+            telemetry.mark()
+        if scaler is not None:
+            scaler.step(optimizer)
+            scaler.update()
+        else:
+            optimizer.step()
+        if telemetry is not None:
+            telemetry.end(loss)
+        steps += 1
+        samples += len(data)
+        if on_step is not None:
+            on_step(batch_idx + 1)
+        if verbose and batch_idx % 100 == 0:
             print('Train Epoch: {} [{}/{} ({:.0f}%)]\tLoss: {:.6f}'.format(
                 epoch, batch_idx * len(data), len(train_loader.dataset),
-                100. * batch_idx / len(train_loader), loss.item()))
+                100. * batch_idx / total_batches, loss.item()))
+        fetch_start = time.perf_counter()
+    return steps, samples
 
 # Define the validation function
-def validate(model, device, test_loader):
+def validate(model, device, test_loader, non_blocking=False,
+             amp_dtype=None, memory_format=torch.contiguous_format):
     model.eval()
     test_loss = 0
     correct = 0
     with torch.no_grad():
         for data, target in test_loader:
-            data, target = data.to(device), target.to(device)
-            output = model(data)
-            test_loss += nn.functional.nll_loss(output, target,
+            data = data.to(device, non_blocking=non_blocking, memory_format=memory_format)
+            target = target.to(device, non_blocking=non_blocking)
+            with autocast(device, amp_dtype):
+                output = model(data)
+            test_loss += nn.functional.nll_loss(output.float(), target,
                                                 reduction='sum').item()
             pred = output.argmax(dim=1,
                                  keepdim=True) # get the index of the max log-probability
@@ -69,50 +545,271 @@ def validate(model, device, test_loader):
         len(test_loader.dataset),
         100. * correct / len(test_loader.dataset)))
 
-# Start time measurement 
-start_time=time.time()
-# Set the device to run on
-device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-
-# Set the batch size and number of epochs
-batch_size = 64
-epochs = args.epochs
-print(f'Training for {epochs} epochs on {torch.device("cuda" if torch.cuda.is_available() else "cpu")}')
-
-# Load the training and validation data
-train_data = datasets.MNIST(root='data', train=True,
-                            download=True,
-                            transform=transforms.Compose([
-                                transforms.ToTensor(),
-                                transforms.Normalize((0.1307,), (0.3081,))
-                            ]))
-test_data = datasets.MNIST(root='data', train=False,
-                           transform=transforms.Compose([
-                               transforms.ToTensor(),
-                               transforms.Normalize((0.1307,), (0.3081,))
-                           ]))
-
-train_loader = DataLoader(train_data,
-                          batch_size=batch_size,
-                          shuffle=True)
-test_loader = DataLoader(test_data,
-                         batch_size=batch_size,
-                         shuffle=True)
-
-# Initialize the model and optimizer
-model = Net().to(device)
-optimizer = torch.optim.Adadelta(model.parameters(), lr=1.0)
-
-# Train the model for the specified number of epochs
-for epoch in range(1, epochs + 1):
-    train(model, device, train_loader, optimizer, epoch)
-    validate(model, device, test_loader)
-
-# Save the trained model
-torch.save(model.state_dict(), "mnist_cnn.pt")
-
-# Time calculation:
-end_time=time.time()
-elapsed_time=end_time-start_time
-print(f'Device : {device}')
-print(f'Time : {elapsed_time:.2f} seconds ')
+    return 100. * correct / len(test_loader.dataset)
+
+def run(args, rank=0, world_size=1):
+    distributed = world_size > 1
+    main_process = rank == 0
+    log = print if main_process else (lambda *a, **k: None)
+
+    # Start time measurement
+    start_time=time.time()
+    # Set the device to run on; data-parallel runs are CPU only
+    device = torch.device("cuda" if torch.cuda.is_available() and not distributed else "cpu")
+
+    # Set the batch size and number of epochs
+    batch_size = 64
+    epochs = args.epochs
+    processes = f' x {world_size} processes' if distributed else ''
+    log(f'Training for {epochs} epochs on {device}{processes}')
+
+    # Restore the full training state, or start fresh
+    checkpoint = None
+    if args.resume:
+        if os.path.exists(args.checkpoint_path):
+            checkpoint = torch.load(args.checkpoint_path, map_location='cpu')
+            log(f"Resuming from {args.checkpoint_path}: epoch {checkpoint['epoch']}, "
+                f"after batch {checkpoint['batch']}")
+        else:
+            log(f'No checkpoint at {args.checkpoint_path}, starting from scratch')
+    if checkpoint is not None:
+        seed = checkpoint['seed']
+    elif args.seed is not None:
+        seed = args.seed
+    else:
+        seed = int(torch.randint(2 ** 31, ()))
+    if distributed:
+        # Every process must shuffle the same way
+        seed_tensor = torch.tensor([seed])
+        dist.broadcast(seed_tensor, 0)
+        seed = int(seed_tensor)
+
+    # Load the training and validation data. With several processes, only
+    # rank 0 downloads (and writes any preload cache); the rest wait for it.
+    if distributed and not main_process:
+        dist.barrier()
+    data_source = resolve_source(args.data_source)
+    log(f'Data source: {data_source}')
+    loader_kwargs, non_blocking = loader_settings(args, device)
+    if args.preload:
+        tensors = preload_mnist(args.preload_cache, data_source)
+        train_loader = PreloadedLoader(*tensors['train'],
+                                       batch_size=batch_size,
+                                       shuffle=True,
+                                       num_replicas=world_size,
+                                       rank=rank,
+                                       seed=seed)
+        test_loader = PreloadedLoader(*tensors['test'],
+                                      batch_size=batch_size,
+                                      shuffle=True)
+    else:
+        transform = transforms.Compose([
+            transforms.ToTensor(),
+            transforms.Normalize((MNIST_MEAN,), (MNIST_STD,))
+        ])
+        train_data = MNISTTensors(*load_mnist(data_source, True), transform=transform)
+        test_data = MNISTTensors(*load_mnist(data_source, False), transform=transform)
+
+        sampler = ResumableSampler(train_data, seed, num_replicas=world_size, rank=rank)
+        train_loader = DataLoader(train_data,
+                                  batch_size=batch_size,
+                                  sampler=sampler,
+                                  **loader_kwargs)
+        test_loader = DataLoader(test_data,
+                                 batch_size=batch_size,
+                                 shuffle=True,
+                                 **loader_kwargs)
+        log('Data loading: ' + ', '.join(f'{k}={v}' for k, v in loader_kwargs.items())
+            + f', non_blocking={non_blocking}')
+    if distributed and main_process:
+        dist.barrier()
+
+    # Initialize the model and optimizer
+    memory_format = torch.channels_last if args.channels_last else torch.contiguous_format
+    model = Net()
+    if checkpoint is not None:
+        model.load_state_dict(checkpoint['model'])
+    model = model.to(device, memory_format=memory_format)
+    amp_dtype = AMP_DTYPES[args.amp]
+    scaler = torch.amp.GradScaler(device.type) if args.amp == 'fp16' else None
+    compile_time = None
+    if args.compile:
+        # One-off cost, reported separately from the steady-state step time
+        model, backend, compile_time = compile_model(model, args.compile, device, batch_size,
+                                                     amp_dtype, memory_format)
+    eval_model = model
+    if distributed:
+        # Gradients are averaged across processes after every backward pass
+        model = DistributedDataParallel(model)
+    optimizer = torch.optim.Adadelta(model.parameters(), lr=1.0)
+
+    start_epoch, start_batch = 1, 0
+    if checkpoint is not None:
+        optimizer.load_state_dict(checkpoint['optimizer'])
+        if scaler is not None and checkpoint['scaler'] is not None:
+            scaler.load_state_dict(checkpoint['scaler'])
+        torch.set_rng_state(checkpoint['rng'])
+        if checkpoint['cuda_rng'] is not None and torch.cuda.is_available():
+            torch.cuda.set_rng_state_all(checkpoint['cuda_rng'])
+        start_epoch, start_batch = checkpoint['epoch'], checkpoint['batch']
+
+    # Only rank 0 writes checkpoints; the model is the same in every process
+    checkpointer = None
+    if args.checkpoint_every is not None and main_process:
+        checkpointer = AsyncCheckpointer(args.checkpoint_path)
+    step_count = 0
+
+    def on_step(batches_done):
+        nonlocal step_count
+        step_count += 1
+        if args.checkpoint_every and step_count % args.checkpoint_every == 0:
+            checkpointer.save(training_state(model, optimizer, scaler, epoch, batches_done, seed))
+
+    # Step timings and run phase totals, from rank 0 only
+    telemetry = Telemetry(args.telemetry, args.telemetry_every, device) if args.telemetry and main_process else None
+    setup_seconds = time.time() - start_time
+    validate_seconds = 0.0
+
+    # Train the model for the specified number of epochs
+    epoch_times = []
+    steps = 0
+    samples = 0
+    accuracy = None
+    sampler_or_loader = train_loader if args.preload else train_loader.sampler
+    for epoch in range(start_epoch, epochs + 1):
+        # Reshuffle each epoch, consistently across processes and resumes
+        sampler_or_loader.set_epoch(epoch)
+        first_batch = start_batch if epoch == start_epoch else 0
+        sampler_or_loader.skip(first_batch * batch_size)
+        epoch_start = time.time()
+        epoch_steps, epoch_samples = train(model, device, train_loader, optimizer, epoch, non_blocking,
+                                           amp_dtype, scaler, memory_format, verbose=main_process,
+                                           start_batch=first_batch,
+                                           on_step=on_step if checkpointer else None,
+                                           telemetry=telemetry)
+        epoch_times.append(time.time() - epoch_start)
+        steps += epoch_steps
+        samples += epoch_samples
+        if checkpointer:
+            checkpointer.save(training_state(model, optimizer, scaler, epoch + 1, 0, seed))
+        # Validation runs on rank 0 only, outside DDP, so it needs no collectives
+        if main_process:
+            validate_start = time.time()
+            accuracy = validate(eval_model, device, test_loader, non_blocking, amp_dtype, memory_format)
+            validate_seconds += time.time() - validate_start
+        if distributed:
+            dist.barrier()
+
+    if not main_process:
+        return
+    if checkpointer:
+        checkpointer.close()
+        log(f'Checkpoint : {checkpointer.written} written to {args.checkpoint_path}')
+
+    # Save the trained model
+    save_start = time.time()
+    state_dict = plain_state_dict(model)
+    torch.save(state_dict, "mnist_cnn.pt")
+    if args.compile:
+        export_torchscript(state_dict)
+    if telemetry is not None:
+        # Where the overall Time figure goes: data download and model
+        # construction, training, validation and saving
+        telemetry.flush()
+        telemetry.write({'event': 'run',
+                         'setup_s': round(setup_seconds, 3),
+                         'train_s': round(sum(epoch_times), 3),
+                         'validate_s': round(validate_seconds, 3),
+                         'save_s': round(time.time() - save_start, 3),
+                         'steps': steps,
+                         'sampled_every': telemetry.every})
+        telemetry.close()
+
+    # What makes runs comparable, for the results record and the scaling baseline
+    config = {
+        'processes': world_size,
+        'data_source': data_source,
+        'preload': args.preload,
+        'amp': args.amp,
+        'channels_last': args.channels_last,
+        'compile': backend if compile_time is not None else None,
+        'workers': loader_kwargs['num_workers'],
+    }
+
+    # Time calculation:
+    end_time=time.time()
+    elapsed_time=end_time-start_time
+    print(f'Device : {device}')
+    print(f'Time : {elapsed_time:.2f} seconds ')
+    # Training-only time per epoch, so preloaded and transform-per-sample
+    # data paths can be compared without download and setup costs
+    if steps:
+        data_mode = 'preloaded' if args.preload else 'per-sample transforms'
+        print(f'Epoch : {sum(epoch_times) / len(epoch_times):.2f} seconds average ({data_mode})')
+        # Final accuracy next to the precision used, to show the speed/accuracy tradeoff
+        layout = ', channels_last' if args.channels_last else ''
+        print(f'Accuracy : {accuracy:.2f}% (amp={args.amp}{layout})')
+        print(f'Step : {sum(epoch_times) / steps * 1000:.2f} ms average')
+        # Aggregate over all processes, which all run the same number of samples
+        samples_per_sec = samples * world_size / sum(epoch_times)
+        print(f'Throughput : {samples_per_sec:.0f} samples/sec ({world_size} process{"es" if distributed else ""})')
+        if distributed:
+            # Measured against --baseline-sps, or else the latest matching single-process record
+            baseline_sps, baseline_source = args.baseline_sps, '--baseline-sps'
+            if not baseline_sps and args.results:
+                baseline_sps, baseline_source = baseline_from_results(args.results, config), args.results
+            if baseline_sps:
+                efficiency = samples_per_sec / (world_size * baseline_sps)
+                print(f'Scaling : {samples_per_sec / baseline_sps:.2f}x speedup, '
+                      f'{efficiency:.0%} efficiency over {world_size} processes '
+                      f'(baseline {baseline_sps:.0f} samples/sec from {baseline_source})')
+            else:
+                print('Scaling : no single-process baseline; run once without --ddp-cpu and the same '
+                      'options to record one, or pass --baseline-sps')
+    if compile_time is not None:
+        print(f'Compile : {compile_time:.2f} seconds ({backend})')
+
+    if args.results:
+        write_result(args.results, {
+            'kind': 'train',
+            'device': device.type,
+            'epochs': epochs,
+            'seconds': round(elapsed_time, 3),
+            'epoch_seconds': round(sum(epoch_times) / len(epoch_times), 3) if steps else None,
+            'step_ms': round(sum(epoch_times) / steps * 1000, 3) if steps else None,
+            'samples_per_sec': round(samples * world_size / sum(epoch_times), 1) if steps else None,
+            'accuracy': accuracy,
+            'compile_seconds': round(compile_time, 3) if compile_time is not None else None,
+            'config': config,
+        })
+
+def ddp_cpu_worker(rank, world_size, args):
+    """Entry point for one data-parallel process, spawned or started by torchrun."""
+    # MASTER_ADDR and MASTER_PORT come from torchrun or from main()
+    dist.init_process_group('gloo', rank=rank, world_size=world_size)
+    # Split the cores between processes instead of oversubscribing them
+    torch.set_num_threads(max(1, (os.cpu_count() or 1) // world_size))
+    try:
+        run(args, rank, world_size)
+    finally:
+        dist.destroy_process_group()
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+def main(args):
+    world_size = int(os.environ.get('WORLD_SIZE', '1'))
+    if 'RANK' in os.environ and world_size > 1:
+        # Started by torchrun, e.g. torchrun --standalone --nproc_per_node=4 train.py --ddp-cpu 4
+        ddp_cpu_worker(int(os.environ['RANK']), world_size, args)
+    elif args.ddp_cpu and args.ddp_cpu > 1:
+        os.environ.setdefault('MASTER_ADDR', '127.0.0.1')
+        os.environ.setdefault('MASTER_PORT', str(free_port()))
+        mp.spawn(ddp_cpu_worker, args=(args.ddp_cpu, args), nprocs=args.ddp_cpu)
+    else:
+        run(args)
+
+if __name__ == "__main__":
+    main(parse_args())
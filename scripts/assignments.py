@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+"""
+Sticky student-to-instance assignments.
+
+Assignments are kept in a JSON file keyed by student email, so
+regenerating the report keeps every existing lab link. Only the changes
+are reconciled: students who left free their instance, students whose
+instance disappeared lose it, and students without one take the next
+free instance. Every change is appended to the file's history.
+
+Usage:
+    python assignments.py [--file FILE] [--history N]
+"""
+
+import argparse
+import json
+import os
+import sys
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+SCRIPT_DIR = Path(__file__).parent
+ASSIGNMENTS_PATH = SCRIPT_DIR / "assignments.json"
+
+# reconcile() refuses to drop more than this share of the pairings at once
+MAX_LOST_FRACTION = 0.5
+
+
+class AssignmentLossError(RuntimeError):
+    """The instance list would take away too many existing pairings at once."""
+
+
+class AssignmentFileError(RuntimeError):
+    """The assignments file exists but cannot be read as an assignment table."""
+
+
+def student_key(student: dict) -> str:
+    return student["email"].strip().lower()
+
+
+class AssignmentTable:
+    """
+    {student key: instance name} plus a history of changes, stored as
+    {"assignments": {...}, "history": [{time, event, student, instance}, ...]}
+    """
+
+    def __init__(self, path: Optional[Path] = ASSIGNMENTS_PATH):
+        """
+        Load the table from `path`; a path of None gives an empty table that
+        is never saved. Raises AssignmentFileError if the file is corrupt.
+        """
+        self.path = Path(path) if path is not None else None
+        self.assignments = {}
+        self.history = []
+        if self.path is None:
+            return
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except ValueError as e:
+            raise AssignmentFileError(f"{self.path} is not valid JSON ({e})") from e
+        if not isinstance(data, dict) or not isinstance(data.get("assignments", {}), dict):
+            raise AssignmentFileError(f"{self.path} does not hold an assignment table")
+        self.assignments = dict(data.get("assignments", {}))
+        self.history = list(data.get("history", []))
+
+    def save(self) -> None:
+        if self.path is None:
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump({"assignments": self.assignments, "history": self.history}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    def _record(self, event: str, student: str, instance: str, now: str) -> None:
+        self.history.append({"time": now, "event": event, "student": student, "instance": instance})
+
+    def reconcile(self, students: list[dict], instance_names, allow_lost: bool = False) -> list[dict]:
+        """
+        Bring the table up to date with the current students and instances,
+        keeping every pairing that is still valid. New pairings go to
+        students in name order, taking free instances in name order, so a
+        fresh table matches the old sort-and-zip assignment. Returns the
+        history entries added.
+
+        An empty instance list, or one missing the instances of more than
+        MAX_LOST_FRACTION of the pairings, usually means brev returned a
+        partial answer rather than that the instances are gone. Unless
+        `allow_lost` is set, that raises AssignmentLossError and leaves
+        the table untouched.
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        start = len(self.history)
+        students_by_key = {student_key(s): s for s in students}
+        instances = set(instance_names)
+
+        lost = [key for key, instance in self.assignments.items()
+                if key in students_by_key and instance not in instances]
+        if lost and not allow_lost and (
+                not instances or (len(lost) > 1 and len(lost) > MAX_LOST_FRACTION * len(self.assignments))):
+            raise AssignmentLossError(
+                f"{len(lost)} of {len(self.assignments)} assigned instances are missing "
+                f"from the {len(instances)} instances found")
+
+        for key, instance in list(self.assignments.items()):
+            if key not in students_by_key:
+                del self.assignments[key]
+                self._record("released", key, instance, now)
+            elif instance not in instances:
+                del self.assignments[key]
+                self._record("lost", key, instance, now)
+
+        used = set(self.assignments.values())
+        free = sorted(instances - used, reverse=True)
+        waiting = sorted((s for k, s in students_by_key.items() if k not in self.assignments),
+                         key=lambda s: s["full_name"])
+        for student in waiting:
+            if not free:
+                break
+            instance = free.pop()
+            self.assignments[student_key(student)] = instance
+            self._record("assigned", student_key(student), instance, now)
+        return self.history[start:]
+
+    def instance_for(self, student: dict) -> Optional[str]:
+        return self.assignments.get(student_key(student))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show student-to-instance assignments")
+    parser.add_argument("--file", type=Path, default=ASSIGNMENTS_PATH,
+                        help=f"Assignments file (default: {ASSIGNMENTS_PATH})")
+    parser.add_argument("--history", type=int, default=0, metavar="N", help="Also show the last N changes")
+    args = parser.parse_args()
+
+    try:
+        table = AssignmentTable(args.file)
+    except AssignmentFileError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for student, instance in sorted(table.assignments.items()):
+        print(f"  {student:<40} {instance}")
+    print(f"{len(table.assignments)} assignments")
+    if args.history:
+        print("\nRecent changes:")
+        for entry in table.history[-args.history:]:
+            print(f"  {entry['time']}  {entry['event']:<9} {entry['student']:<40} {entry['instance']}")
+
+
+if __name__ == "__main__":
+    main()
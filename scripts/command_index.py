@@ -0,0 +1,31 @@
+"""
+Command index - constant-time command lookup for the DOCA simulator
+"""
+
+from bisect import bisect_left
+
+
+def build_command_index(commands):
+    """
+    Map each normalized command to the sorted list of row positions it appears at.
+    Rows are visited in order, so every position list is already sorted.
+    """
+    index = {}
+    for position, command in enumerate(commands):
+        index.setdefault(command, []).append(position)
+    return index
+
+
+def find_next(index, command, start):
+    """
+    Return the first row position of `command` at or after `start`.
+    Wraps around to the first occurrence when there is none further on,
+    and returns None when the command is not in the scenario at all.
+    """
+    positions = index.get(command)
+    if not positions:
+        return None
+    i = bisect_left(positions, start)
+    if i < len(positions):
+        return positions[i]
+    return positions[0]
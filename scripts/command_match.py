@@ -0,0 +1,147 @@
+"""
+Command match - normalized and nearest-match lookup for DOCA simulator commands
+"""
+
+from collections import defaultdict
+
+# Characters that commonly sneak in when commands are copied from PDFs or
+# slides: typographic dashes and quotes, non-breaking and zero-width spaces
+_FOLD = str.maketrans({
+    '\u2010': '-', '\u2011': '-', '\u2012': '-', '\u2013': '-', '\u2014': '-', '\u2212': '-',
+    '\u2018': "'", '\u2019': "'", '\u201a': "'", '\u201b': "'",
+    '\u201c': '"', '\u201d': '"', '\u201e': '"', '\u201f': '"',
+    '\u00a0': ' ', '\u2007': ' ', '\u202f': ' ',
+    '\u200b': None, '\u200c': None, '\u200d': None, '\ufeff': None,
+})
+
+# Suggestions below this similarity are not worth showing
+MIN_SIMILARITY = 0.3
+
+# Features shared by more commands than this (e.g. "sudo") are too common
+# to narrow the search, so they are skipped when collecting candidates
+MAX_POSTINGS = 256
+
+
+def normalize(text):
+    """Fold dashes, quotes and odd spaces, then collapse whitespace."""
+    return ' '.join(text.translate(_FOLD).split())
+
+
+def strip_sudo(key):
+    """Drop a leading `sudo ` from a normalized command, but not from `sudo -i` and friends."""
+    if key.startswith('sudo ') and not key[5:].startswith('-'):
+        return key[5:]
+    return key
+
+
+def _features(key):
+    """Tokens, token bigrams and per-token character trigrams of a normalized command."""
+    tokens = strip_sudo(key).split()
+    features = set(tokens)
+    features.update(f"{a} {b}" for a, b in zip(tokens, tokens[1:]))
+    for token in tokens:
+        padded = f"^{token}$"
+        features.update('#' + padded[i:i + 3] for i in range(len(padded) - 2))
+    return features
+
+
+class CommandMatcher:
+    """
+    Resolves what a student typed to a scenario command.
+    Exact matches win, then matches after normalize(), then matches that
+    only differ by a `sudo` prefix when that is unambiguous. The n-gram
+    index behind suggest() is built on the first miss.
+    """
+
+    def __init__(self, commands):
+        self.exact = frozenset(commands)
+
+        # On a collision prefer the command that is already in normal form,
+        # so `sudo -i` resolves to itself rather than the en-dash variant
+        self.normalized = {}
+        for command in self.exact:
+            key = normalize(command)
+            if key not in self.normalized or command == key:
+                self.normalized[key] = command
+
+        # None marks a bare form shared by several commands
+        self.unprefixed = {}
+        for key, command in self.normalized.items():
+            bare = strip_sudo(key)
+            if bare in self.unprefixed and self.unprefixed[bare] != command:
+                self.unprefixed[bare] = None
+            else:
+                self.unprefixed[bare] = command
+
+        # Cheap pre-filter for the input transformer
+        tokens = set()
+        for command in self.exact:
+            tokens.update(command.split(None, 1)[:1])
+        for bare in self.unprefixed:
+            tokens.update(bare.split(None, 1)[:1])
+        tokens.add('sudo')
+        self.first_tokens = frozenset(tokens)
+        self.max_token_len = max(map(len, tokens))
+        self.min_len = min(map(len, self.unprefixed), default=0)
+        self.max_len = max(map(len, self.exact), default=0)
+
+        self._postings = None
+        self._feature_counts = None
+        self._keys = None
+
+    def could_match(self, token, length):
+        """
+        Whether a cell whose first token is `token` and whose stripped
+        length is `length` can possibly resolve. Extra whitespace is allowed
+        for, so the upper bound is loose.
+        """
+        if token is not None and token not in self.first_tokens:
+            # Only tokens with non-ASCII characters can change when folded
+            if token.isascii() or token.translate(_FOLD) not in self.first_tokens:
+                return False
+        return self.min_len <= length <= 2 * self.max_len + 64
+
+    def resolve(self, text):
+        """The scenario command `text` stands for, or None."""
+        if text in self.exact:
+            return text
+        key = normalize(text)
+        command = self.normalized.get(key)
+        if command is None:
+            command = self.unprefixed.get(strip_sudo(key))
+        return command
+
+    def _build_ngram_index(self):
+        self._keys = list(self.normalized)
+        self._postings = defaultdict(list)
+        self._feature_counts = []
+        for i, key in enumerate(self._keys):
+            features = _features(key)
+            self._feature_counts.append(len(features))
+            for feature in features:
+                self._postings[feature].append(i)
+
+    def suggest(self, text):
+        """The most similar scenario command to `text`, or None if nothing is close."""
+        if self._postings is None:
+            self._build_ngram_index()
+        query = _features(normalize(text))
+        if not query:
+            return None
+
+        # Count shared features per candidate, skipping very common ones
+        # unless nothing else matches
+        postings = [self._postings[f] for f in query if f in self._postings]
+        selective = [p for p in postings if len(p) <= MAX_POSTINGS] or postings
+        shared = defaultdict(int)
+        for posting in selective:
+            for i in posting:
+                shared[i] += 1
+
+        best = None
+        best_score = MIN_SIMILARITY
+        for i, count in shared.items():
+            score = count / (len(query) + self._feature_counts[i] - count)
+            if score > best_score:
+                best, best_score = i, score
+        return None if best is None else self.normalized[self._keys[best]]
@@ -1,20 +1,55 @@
-import pandas as pd
+import argparse
+import csv
 import os
+import sys
+
+from scenario_store import DEFAULT_SCENARIO_PATH, compile_scenario, migrate_to_state_machine
 
 def convert_csv():
     current_dir = os.getcwd()
     file_path = os.path.join(current_dir, 'dpu simulator', 'doca_installation_commands.csv')
-    
+
     # Read the pipe-separated CSV
-    df = pd.read_csv(file_path, sep='|')
-    
+    with open(file_path, newline='', encoding='utf-8') as f:
+        rows = list(csv.reader(f, delimiter='|'))
+
     # Remove the first column (index)
-    if len(df.columns) > 0:
-        df = df.iloc[:, 1:]
-    
+    rows = [row[1:] for row in rows]
+
     # Write back as comma-separated CSV, with quoting
-    df.to_csv(file_path, index=False, quoting=1) # quoting=1 is csv.QUOTE_ALL
+    with open(file_path, 'w', newline='', encoding='utf-8') as f:
+        csv.writer(f, quoting=csv.QUOTE_ALL).writerows(rows)
+
+def compile_csvs(paths):
+    """Compile scenario CSVs into memory-mappable .scn files for the simulator."""
+    failed = False
+    for path in paths:
+        try:
+            output_path = compile_scenario(path)
+            print(f"Compiled {path} -> {output_path}")
+        except (OSError, ValueError) as e:
+            print(f"Error compiling {path}: {e}")
+            failed = True
+    return not failed
+
+def migrate_csv(path, output_path=None):
+    """Rewrite a linear scenario CSV as a state-machine CSV (State, Command, Output, Next)."""
+    output_path = output_path or os.path.splitext(path)[0] + '_states.csv'
+    migrate_to_state_machine(path, output_path)
+    print(f"Migrated {path} -> {output_path}")
 
 if __name__ == "__main__":
-    convert_csv()
+    parser = argparse.ArgumentParser(description="Convert or compile DPU simulator scenario files")
+    parser.add_argument('--compile', nargs='*', metavar='CSV',
+                        help=f"Compile scenario CSVs to binary (default: {DEFAULT_SCENARIO_PATH})")
+    parser.add_argument('--migrate', metavar='CSV',
+                        help="Rewrite a linear scenario CSV as an equivalent state-machine CSV")
+    parser.add_argument('--output', '-o', help="Output file for --migrate (default: <CSV>_states.csv)")
+    args = parser.parse_args()
 
+    if args.migrate:
+        migrate_csv(args.migrate, args.output)
+    elif args.compile is None:
+        convert_csv()
+    elif not compile_csvs(args.compile or [DEFAULT_SCENARIO_PATH]):
+        sys.exit(1)
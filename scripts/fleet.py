@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+Fleet operations for the module 8 lab instances.
+
+Runs brev across every matching instance through a bounded worker pool,
+retrying failures with exponential backoff, and prints progress plus a
+summary at the end.
+
+Usage:
+    python fleet.py status [--match PATTERN]
+    python fleet.py stop   [--match PATTERN] [--workers N] [--retries N] [--dry-run]
+    python fleet.py start  [--match PATTERN] [--workers N] [--retries N] [--dry-run]
+    python fleet.py refresh
+
+Instances already in the target state (STOPPED for stop, RUNNING for
+start) are skipped. Exits with status 1 if any instance failed.
+"""
+
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from inventory import INSTANCE_PREFIX, BrevCLI, BrevError, Inventory, parse_brev_ls
+
+DEFAULT_WORKERS = 16
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 1.0
+
+# Status `brev ls` shows once an action has taken effect
+TARGET_STATUS = {"start": "RUNNING", "stop": "STOPPED"}
+PROGRESSIVE = {"start": "Starting", "stop": "Stopping"}
+
+
+def list_instances(brev: BrevCLI, match: str) -> dict[str, dict]:
+    """Current instances whose name contains `match`."""
+    instances = parse_brev_ls(brev.ls(), prefix=" ")
+    return {name: data for name, data in instances.items() if match in name}
+
+
+def run_with_retry(action, name: str, retries: int, backoff: float, sleep=time.sleep) -> tuple[bool, int, str]:
+    """
+    Call action(name) until it exits 0, at most 1 + `retries` times,
+    waiting backoff, 2 * backoff, 4 * backoff, ... (with jitter) in between.
+    Returns (succeeded, attempts, last error output).
+    """
+    error = ""
+    for attempt in range(retries + 1):
+        if attempt:
+            sleep(backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5))
+        try:
+            result = action(name)
+        except OSError as e:
+            # brev itself is missing or not executable; retrying will not help
+            return False, attempt + 1, str(e)
+        if result.returncode == 0:
+            return True, attempt + 1, ""
+        lines = (result.stderr or result.stdout).strip().splitlines()
+        error = lines[-1] if lines else f"exit status {result.returncode}"
+    return False, retries + 1, error
+
+
+def run_action(brev: BrevCLI, action: str, names: list[str], workers: int, retries: int,
+               backoff: float, dry_run: bool = False) -> dict[str, tuple[bool, int, str]]:
+    """Run `action` (start or stop) on every instance in `names`; returns {name: outcome}."""
+    if dry_run:
+        for name in names:
+            print(f"  would run: {brev.executable} {action} {name}")
+        return {}
+
+    outcomes = {}
+    call = getattr(brev, action)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {pool.submit(run_with_retry, call, name, retries, backoff): name for name in names}
+        for future in as_completed(futures):
+            name = futures[future]
+            outcomes[name] = ok, attempts, error = future.result()
+            retried = f" after {attempts} attempts" if attempts > 1 else ""
+            detail = f"{action} ok{retried}" if ok else f"FAILED{retried}: {error}"
+            print(f"  [{len(outcomes)}/{len(names)}] {name}: {detail}", flush=True)
+    return outcomes
+
+
+def print_status(instances: dict[str, dict]) -> None:
+    for name, data in sorted(instances.items()):
+        print(f"  {name:<40} {data['status']:<10} {data['build']}")
+    counts = Counter(data["status"] for data in instances.values())
+    summary = ", ".join(f"{count} {status}" for status, count in sorted(counts.items()))
+    print(f"{len(instances)} instances" + (f": {summary}" if summary else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Start, stop or inspect module 8 lab instances in parallel")
+    parser.add_argument("command", choices=["status", "start", "stop", "refresh"])
+    parser.add_argument("--match", default=INSTANCE_PREFIX.strip(),
+                        help=f"Only instances whose name contains this (default: {INSTANCE_PREFIX.strip()})")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS,
+                        help=f"brev commands in flight at once (default: {DEFAULT_WORKERS})")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES,
+                        help=f"Retries per instance after a failure (default: {DEFAULT_RETRIES})")
+    parser.add_argument("--backoff", type=float, default=DEFAULT_BACKOFF,
+                        help=f"Seconds before the first retry, doubling each time (default: {DEFAULT_BACKOFF})")
+    parser.add_argument("--dry-run", "-n", action="store_true", help="Show what would run without running it")
+    parser.add_argument("--brev", default="brev", help="brev executable (default: brev on PATH)")
+    args = parser.parse_args()
+
+    brev = BrevCLI(args.brev)
+    start = time.perf_counter()
+
+    if args.command == "refresh":
+        if args.dry_run:
+            print(f"  would run: {brev.executable} refresh")
+            return
+        ok, attempts, error = run_with_retry(lambda _: brev.run("refresh"), "refresh", args.retries, args.backoff)
+        print("Refreshed brev SSH config" if ok else f"Refresh failed after {attempts} attempts: {error}")
+        sys.exit(0 if ok else 1)
+
+    try:
+        instances = list_instances(brev, args.match)
+    except (BrevError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    if args.command == "status":
+        print_status(instances)
+        return
+
+    target = TARGET_STATUS[args.command]
+    names = sorted(name for name, data in instances.items() if data["status"] != target)
+    skipped = len(instances) - len(names)
+    print(f"{PROGRESSIVE[args.command]} {len(names)} of {len(instances)} instances matching "
+          f"'{args.match}' ({skipped} already {target}), {args.workers} at a time...")
+    outcomes = run_action(brev, args.command, names, args.workers, args.retries, args.backoff, args.dry_run)
+    if args.dry_run:
+        return
+
+    # The cached inventory no longer reflects instance states
+    Inventory(brev=brev).invalidate()
+
+    failed = sorted(name for name, (ok, _, _) in outcomes.items() if not ok)
+    retried = sum(1 for ok, attempts, _ in outcomes.values() if ok and attempts > 1)
+    print(f"\nSummary: {len(outcomes) - len(failed)} ok ({retried} after retries), {len(failed)} failed, "
+          f"{skipped} skipped in {time.perf_counter() - start:.1f}s")
+    for name in failed:
+        print(f"  failed: {name}: {outcomes[name][2]}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
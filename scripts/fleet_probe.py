@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Concurrent health probes for lab instances.
+
+Each probe opens a TCP connection to the Jupyter port, sends an HTTP GET
+and reads the status line. Probes run concurrently on one asyncio loop,
+at most `concurrency` at a time, each bounded by `timeout`, so probing a
+whole cohort takes about as long as the slowest probe.
+
+Usage:
+    python fleet_probe.py HOST [HOST ...] [--port PORT] [--timeout SECONDS]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+
+PROBE_TIMEOUT = 3.0
+PROBE_CONCURRENCY = 64
+
+
+async def probe(host: str, port: int, timeout: float = PROBE_TIMEOUT, path: str = "/") -> dict:
+    """
+    Probe one host. Returns {ok, status, tcp_ms, http_ms, error}, where
+    http_ms is the time to the response status line. Any HTTP response
+    below 500 counts as up; Jupyter answers / with a redirect to its
+    login page.
+    """
+    result = {"ok": False, "status": None, "tcp_ms": None, "http_ms": None, "error": None}
+    start = time.perf_counter()
+    writer = None
+
+    async def exchange():
+        nonlocal writer
+        reader, writer = await asyncio.open_connection(host, port)
+        result["tcp_ms"] = (time.perf_counter() - start) * 1000
+        writer.write(f"GET {path} HTTP/1.0\r\nHost: {host}:{port}\r\n\r\n".encode())
+        await writer.drain()
+        status_line = await reader.readline()
+        result["http_ms"] = (time.perf_counter() - start) * 1000
+        return status_line
+
+    try:
+        status_line = await asyncio.wait_for(exchange(), timeout)
+        parts = status_line.decode("latin-1").split()
+        if len(parts) < 2 or not parts[0].startswith("HTTP/") or not parts[1].isdigit():
+            result["error"] = "not an HTTP response"
+        else:
+            result["status"] = int(parts[1])
+            result["ok"] = result["status"] < 500
+            if not result["ok"]:
+                result["error"] = f"HTTP {result['status']}"
+    except asyncio.TimeoutError:
+        result["error"] = f"timed out after {timeout:g}s"
+    except OSError as e:
+        # asyncio puts the address in strerror; the errno text is clearer
+        result["error"] = os.strerror(e.errno) if e.errno else str(e)
+    finally:
+        if writer is not None:
+            writer.close()
+    return result
+
+
+async def probe_all(hosts: list[str], port: int, timeout: float = PROBE_TIMEOUT,
+                    concurrency: int = PROBE_CONCURRENCY) -> dict[str, dict]:
+    """Probe every host, at most `concurrency` at once. Returns {host: result}."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def bounded(host):
+        async with semaphore:
+            return await probe(host, port, timeout)
+
+    results = await asyncio.gather(*(bounded(host) for host in hosts))
+    return dict(zip(hosts, results))
+
+
+def probe_instances(hosts: list[str], port: int, timeout: float = PROBE_TIMEOUT,
+                    concurrency: int = PROBE_CONCURRENCY) -> dict[str, dict]:
+    """Synchronous entry point for probe_all()."""
+    unique = list(dict.fromkeys(hosts))
+    if not unique:
+        return {}
+    return asyncio.run(probe_all(unique, port, timeout, concurrency))
+
+
+def describe(result: dict) -> str:
+    """One-line summary of a probe result."""
+    if result["ok"]:
+        return f"HTTP {result['status']} in {result['http_ms']:.0f} ms"
+    return result["error"] or "down"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Probe lab instances for a responding Jupyter server")
+    parser.add_argument("hosts", nargs="+", help="Instance hostnames or IPs")
+    parser.add_argument("--port", type=int, default=8888, help="Port to probe (default: 8888)")
+    parser.add_argument("--timeout", type=float, default=PROBE_TIMEOUT,
+                        help=f"Seconds per probe (default: {PROBE_TIMEOUT})")
+    parser.add_argument("--concurrency", type=int, default=PROBE_CONCURRENCY,
+                        help=f"Probes in flight at once (default: {PROBE_CONCURRENCY})")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    results = probe_instances(args.hosts, args.port, args.timeout, args.concurrency)
+    for host, result in results.items():
+        print(f"  {host:<20} {'up' if result['ok'] else 'DOWN':<5} {describe(result)}")
+    print(f"Probed {len(results)} hosts in {time.perf_counter() - start:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
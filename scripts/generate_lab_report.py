@@ -3,21 +3,28 @@
 Generate HTML lab access report for NVIDIA AI Infrastructure training.
 
 Usage:
-    python generate_lab_report.py [--password PASSWORD] [--output FILE]
+    python generate_lab_report.py [--password PASSWORD] [--output FILE] [--format html,csv,json]
 
 The script:
 1. Reads student list from students.csv
-2. Fetches running brev instances and their IPs
-3. Matches students to instances
-4. Generates an HTML report from the template
+2. Fetches running brev instances and their IPs (cached for a few minutes)
+3. Probes Jupyter on every instance concurrently
+4. Matches students to instances, keeping earlier assignments
+5. Writes the report as HTML from the template, and optionally as CSV or JSON
 """
 
 import argparse
 import csv
-import subprocess
 import sys
+import time
 from datetime import datetime
 from pathlib import Path
+from typing import Optional
+
+from fleet_probe import PROBE_CONCURRENCY, PROBE_TIMEOUT, probe_instances
+from assignments import ASSIGNMENTS_PATH, AssignmentFileError, AssignmentLossError, AssignmentTable
+from inventory import INVENTORY_TTL, BrevError, Inventory
+from report_render import REPORT_FORMATS, Template, write_report
 
 
 SCRIPT_DIR = Path(__file__).parent
@@ -28,57 +35,18 @@ DEFAULT_PASSWORD = "Ac15T4BOoEs3@gg0Eo1Lz9"
 JUPYTER_PORT = 8888
 
 
-def run_cmd(cmd: list[str]) -> str:
-    """Run a command and return stdout."""
-    result = subprocess.run(cmd, capture_output=True, text=True)
-    return result.stdout
-
-
-def get_brev_instances() -> dict[str, dict]:
+def get_brev_instances(refresh: bool = False, ttl: float = INVENTORY_TTL, brev=None) -> dict[str, dict]:
     """
     Get all running brev instances with their IPs.
     Returns dict of {instance_name: {ip, status, build}}
+    brev is only queried when the inventory cache is stale or `refresh` is set.
     """
-    # Refresh SSH config
-    print("Refreshing brev...")
-    run_cmd(["brev", "refresh"])
-    
-    # Parse brev ls output
-    output = run_cmd(["brev", "ls"])
-    instances = {}
-    
-    for line in output.strip().split("\n"):
-        # Skip header and info lines
-        if not line.startswith(" lab---module-8"):
-            continue
-        
-        parts = line.split()
-        if len(parts) >= 4:
-            name = parts[0]
-            status = parts[1]
-            build = parts[2]
-            instances[name] = {
-                "status": status,
-                "build": build,
-                "ip": None
-            }
-    
-    # Get IPs from SSH config
-    ssh_config = Path.home() / ".brev" / "ssh_config"
-    if ssh_config.exists():
-        current_host = None
-        with open(ssh_config) as f:
-            for line in f:
-                line = line.strip()
-                if line.startswith("Host ") and not line.endswith("-host"):
-                    current_host = line.split()[1]
-                elif line.startswith("Hostname ") and current_host:
-                    ip = line.split()[1]
-                    if current_host in instances:
-                        instances[current_host]["ip"] = ip
-                    current_host = None
-    
-    return instances
+    inventory = Inventory(brev=brev, ttl=ttl)
+    if refresh or inventory.is_stale():
+        print("Refreshing brev...")
+    else:
+        print(f"  Using cached inventory ({inventory.age():.0f}s old, --refresh to update)")
+    return inventory.instances(refresh=refresh)
 
 
 def load_students(csv_path: Path) -> list[dict]:
@@ -96,22 +64,44 @@ def load_students(csv_path: Path) -> list[dict]:
     return students
 
 
-def match_students_to_instances(students: list[dict], instances: dict) -> list[dict]:
+def probe_fleet(instances: dict, timeout: float = PROBE_TIMEOUT,
+                concurrency: int = PROBE_CONCURRENCY) -> dict[str, dict]:
+    """Probe Jupyter on every instance with an IP. Returns {ip: probe result}."""
+    ips = [data["ip"] for data in instances.values() if data.get("ip")]
+    return probe_instances(ips, JUPYTER_PORT, timeout, concurrency)
+
+
+def match_students_to_instances(students: list[dict], instances: dict,
+                                probes: Optional[dict[str, dict]] = None,
+                                table: Optional[AssignmentTable] = None) -> list[dict]:
     """
     Match students to instances.
-    Sorts both lists and pairs them in order.
+    Pairings come from `table`, already reconciled with these students and
+    instances; without one, students and instances are sorted by name and
+    paired in order. With `probes`, a completed instance is only "ready" if
+    Jupyter answered; otherwise it is "unreachable".
     """
-    sorted_students = sorted(students, key=lambda s: s["full_name"])
-    sorted_instances = sorted(instances.items())
+    if table is None:
+        table = AssignmentTable(None)
+        table.reconcile(students, instances)
     
     assignments = []
-    for i, student in enumerate(sorted_students):
-        if i < len(sorted_instances):
-            instance_name, instance_data = sorted_instances[i]
+    for student in students:
+        instance_name = table.instance_for(student)
+        probe = None
+        if instance_name is None or instance_name not in instances:
+            lab_link = None
+            status = "unassigned"
+        else:
+            instance_data = instances[instance_name]
             ip = instance_data.get("ip")
             build = instance_data.get("build", "UNKNOWN")
+            probe = probes.get(ip) if probes and ip else None
             
-            if ip and build == "COMPLETED":
+            if ip and build == "COMPLETED" and probe and not probe["ok"]:
+                lab_link = f"http://{ip}:{JUPYTER_PORT}"
+                status = "unreachable"
+            elif ip and build == "COMPLETED":
                 lab_link = f"http://{ip}:{JUPYTER_PORT}"
                 status = "ready"
             elif ip:
@@ -120,48 +110,38 @@ def match_students_to_instances(students: list[dict], instances: dict) -> list[d
             else:
                 lab_link = None
                 status = "error"
-        else:
-            lab_link = None
-            status = "error"
         
         assignments.append({
             **student,
+            "instance": instance_name,
             "lab_link": lab_link,
-            "status": status
+            "status": status,
+            "probe": probe
         })
     
     return assignments
 
 
-def generate_table_rows(assignments: list[dict]) -> str:
-    """Generate HTML table rows."""
-    rows = []
-    for a in sorted(assignments, key=lambda x: x["full_name"]):
-        if a["lab_link"]:
-            status_class = f"status-{a['status']}"
-            link_html = f'<a href="{a["lab_link"]}" target="_blank" class="{status_class}">{a["lab_link"]}</a>'
-        else:
-            link_html = '<span class="status-error">No instance assigned</span>'
-        
-        rows.append(f"""                    <tr>
-                        <td>{a["full_name"]}</td>
-                        <td>{a["email"]}</td>
-                        <td>{link_html}</td>
-                    </tr>""")
-    
-    return "\n".join(rows)
+def parse_formats(value: str) -> list[str]:
+    """argparse type for --format: a comma-separated list of REPORT_FORMATS."""
+    formats = [f.strip().lower() for f in value.split(",") if f.strip()]
+    unknown = [f for f in formats if f not in REPORT_FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(
+            f"expected one or more of {', '.join(REPORT_FORMATS)}, got {value!r}")
+    return list(dict.fromkeys(formats))
 
 
-def generate_report(template: str, password: str, assignments: list[dict]) -> str:
-    """Generate the HTML report from template."""
-    table_rows = generate_table_rows(assignments)
-    current_date = datetime.now().strftime("%B %Y")
-    
-    html = template.replace("{{DATE}}", current_date)
-    html = html.replace("{{PASSWORD}}", password)
-    html = html.replace("{{TABLE_ROWS}}", table_rows)
-    
-    return html
+def report_paths(output: Path, formats: list[str]) -> dict[str, Path]:
+    """
+    Where each format goes: the first one to `output` exactly, the others
+    next to it with their own extension.
+    """
+    paths = {formats[0]: output}
+    for fmt in formats[1:]:
+        path = output.with_suffix(f".{fmt}")
+        paths[fmt] = path if path != output else output.with_name(f"{output.name}.{fmt}")
+    return paths
 
 
 def main():
@@ -177,7 +157,14 @@ def main():
         "--output", "-o",
         type=Path,
         default=DEFAULT_OUTPUT,
-        help=f"Output HTML file (default: {DEFAULT_OUTPUT})"
+        help=f"Output file for the first format; other formats go next to it (default: {DEFAULT_OUTPUT})"
+    )
+    parser.add_argument(
+        "--format", "-f",
+        type=parse_formats,
+        default=["html"],
+        metavar="FORMATS",
+        help=f"Comma-separated report formats from {', '.join(REPORT_FORMATS)} (default: html)"
     )
     parser.add_argument(
         "--students", "-s",
@@ -185,6 +172,45 @@ def main():
         default=STUDENTS_CSV,
         help=f"Students CSV file (default: {STUDENTS_CSV})"
     )
+    parser.add_argument(
+        "--assignments", "-a",
+        type=Path,
+        default=ASSIGNMENTS_PATH,
+        help=f"Persisted student-to-instance assignments (default: {ASSIGNMENTS_PATH})"
+    )
+    parser.add_argument(
+        "--allow-lost",
+        action="store_true",
+        help="Release pairings even when many assigned instances are missing at once"
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Query brev even if the cached inventory is still fresh"
+    )
+    parser.add_argument(
+        "--inventory-ttl",
+        type=float,
+        default=INVENTORY_TTL,
+        help=f"Seconds before the cached inventory is refreshed (default: {INVENTORY_TTL})"
+    )
+    parser.add_argument(
+        "--no-probe",
+        action="store_true",
+        help="Skip checking that Jupyter answers on each instance"
+    )
+    parser.add_argument(
+        "--probe-timeout",
+        type=float,
+        default=PROBE_TIMEOUT,
+        help=f"Seconds to wait for each instance (default: {PROBE_TIMEOUT})"
+    )
+    parser.add_argument(
+        "--probe-concurrency",
+        type=int,
+        default=PROBE_CONCURRENCY,
+        help=f"Instances probed at once (default: {PROBE_CONCURRENCY})"
+    )
     args = parser.parse_args()
     
     # Validate inputs
@@ -197,7 +223,7 @@ def main():
         sys.exit(1)
     
     # Load template
-    template = TEMPLATE_PATH.read_text()
+    template = Template.load(TEMPLATE_PATH)
     
     # Load students
     print(f"Loading students from {args.students}...")
@@ -206,28 +232,66 @@ def main():
     
     # Get brev instances
     print("Fetching brev instances...")
-    instances = get_brev_instances()
+    try:
+        instances = get_brev_instances(args.refresh, args.inventory_ttl)
+    except (BrevError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
     print(f"  Found {len(instances)} running instances")
     
+    # Check that Jupyter actually answers
+    probes = None
+    if not args.no_probe:
+        print(f"Probing Jupyter on port {JUPYTER_PORT}...")
+        start = time.perf_counter()
+        probes = probe_fleet(instances, args.probe_timeout, args.probe_concurrency)
+        up_count = sum(1 for p in probes.values() if p["ok"])
+        print(f"  {up_count}/{len(probes)} responding ({time.perf_counter() - start:.1f}s)")
+    
+    # Keep existing pairings; only new students and lost instances change
+    try:
+        table = AssignmentTable(args.assignments)
+    except AssignmentFileError as e:
+        print(f"Error: {e}")
+        print(f"  Fix or restore {args.assignments}; deleting it starts every assignment from scratch.")
+        sys.exit(1)
+    try:
+        changes = table.reconcile(students, instances, allow_lost=args.allow_lost)
+    except AssignmentLossError as e:
+        print(f"Error: {e}; {args.assignments} was not changed.")
+        print("  Check `brev ls`, or pass --allow-lost if those instances are really gone.")
+        sys.exit(1)
+    table.save()
+    for event in ("assigned", "released", "lost"):
+        count = sum(1 for c in changes if c["event"] == event)
+        if count:
+            print(f"  {event.capitalize()}: {count} (see {args.assignments})")
+    
     # Match students to instances
-    assignments = match_students_to_instances(students, instances)
+    assignments = match_students_to_instances(students, instances, probes, table)
     
     ready_count = sum(1 for a in assignments if a["status"] == "ready")
     building_count = sum(1 for a in assignments if a["status"] == "building")
+    unreachable_count = sum(1 for a in assignments if a["status"] == "unreachable")
     error_count = sum(1 for a in assignments if a["status"] == "error")
+    unassigned_count = sum(1 for a in assignments if a["status"] == "unassigned")
     
     print(f"\nAssignment summary:")
     print(f"  Ready: {ready_count}")
     print(f"  Building: {building_count}")
-    print(f"  Error/Unassigned: {error_count}")
+    print(f"  Unreachable: {unreachable_count}")
+    print(f"  Error: {error_count}")
+    print(f"  Unassigned: {unassigned_count}")
     
-    # Generate report
-    html = generate_report(template, args.password, assignments)
-    
-    # Write output
-    args.output.write_text(html)
-    print(f"\nReport generated: {args.output}")
-    print(f"Open in browser: file://{args.output.absolute()}")
+    # Generate reports, streamed straight to their files
+    current_date = datetime.now().strftime("%B %Y")
+    print()
+    paths = report_paths(args.output, args.format)
+    for fmt, output in paths.items():
+        write_report(output, fmt, assignments, template, current_date, args.password)
+        print(f"Report generated: {output}")
+    if "html" in paths:
+        print(f"Open in browser: file://{paths['html'].absolute()}")
 
 
 if __name__ == "__main__":
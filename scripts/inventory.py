@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Lab instance inventory, cached between report runs.
+
+`brev refresh` and `brev ls` are slow, so their parsed result is kept in a
+small JSON file and reused until it is older than the TTL. IPs come from
+~/.brev/ssh_config, which is only re-parsed when its mtime or size changes.
+The brev CLI sits behind BrevCLI; anything with the same refresh() and
+ls() methods can stand in for it. Both raise BrevError when brev fails.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+SSH_CONFIG = Path.home() / ".brev" / "ssh_config"
+INVENTORY_CACHE = Path.home() / ".brev" / "module8_inventory.json"
+INVENTORY_TTL = 300
+
+# `brev ls` rows for this module's instances start with this
+INSTANCE_PREFIX = " lab---module-8"
+
+
+class BrevError(RuntimeError):
+    """A brev command exited with a non-zero status."""
+
+
+class BrevCLI:
+    """The brev commands the inventory and fleet tools need."""
+
+    def __init__(self, executable: str = "brev"):
+        self.executable = executable
+
+    def run(self, *args: str) -> subprocess.CompletedProcess:
+        """Run a brev subcommand, capturing its output and exit status."""
+        return subprocess.run([self.executable, *args], capture_output=True, text=True)
+
+    def check(self, *args: str) -> str:
+        """Run a brev subcommand and return its stdout; raises BrevError if it fails."""
+        result = self.run(*args)
+        if result.returncode != 0:
+            lines = (result.stderr or result.stdout).strip().splitlines()
+            detail = lines[-1] if lines else f"exit status {result.returncode}"
+            raise BrevError(f"brev {' '.join(args)} failed: {detail}")
+        return result.stdout
+
+    def refresh(self) -> None:
+        """Refresh brev's SSH config."""
+        self.check("refresh")
+
+    def ls(self) -> str:
+        """Raw `brev ls` output."""
+        return self.check("ls")
+
+    def start(self, name: str) -> subprocess.CompletedProcess:
+        return self.run("start", name)
+
+    def stop(self, name: str) -> subprocess.CompletedProcess:
+        return self.run("stop", name)
+
+
+def parse_brev_ls(output: str, prefix: str = INSTANCE_PREFIX) -> dict[str, dict]:
+    """Parse `brev ls` output into {instance_name: {status, build}}."""
+    instances = {}
+    for line in output.splitlines():
+        # Skip header and info lines
+        if not line.startswith(prefix):
+            continue
+        parts = line.split()
+        if len(parts) >= 4:
+            instances[parts[0]] = {"status": parts[1], "build": parts[2]}
+    return instances
+
+
+def parse_ssh_config(path: Path) -> dict[str, str]:
+    """Map each host in an SSH config to its Hostname, skipping `-host` aliases."""
+    hosts = {}
+    current_host = None
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("Host ") and not line.endswith("-host"):
+                current_host = line.split()[1]
+            elif line.startswith("Hostname ") and current_host:
+                hosts[current_host] = line.split()[1]
+                current_host = None
+    return hosts
+
+
+class Inventory:
+    """
+    Instances with their status, build and IP, backed by a JSON cache file:
+    {"fetched_at": ..., "instances": {...},
+     "ssh_config": {"mtime_ns": ..., "size": ..., "hosts": {...}}}
+    """
+
+    def __init__(self, brev=None, cache_path: Path = INVENTORY_CACHE, ttl: float = INVENTORY_TTL,
+                 ssh_config: Path = SSH_CONFIG, clock=time.time):
+        self.brev = brev or BrevCLI()
+        self.cache_path = Path(cache_path)
+        self.ttl = ttl
+        self.ssh_config = Path(ssh_config)
+        self.clock = clock
+        self.cache = self._read_cache()
+
+    def _read_cache(self) -> dict:
+        try:
+            with open(self.cache_path) as f:
+                cache = json.load(f)
+            return cache if isinstance(cache, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self) -> None:
+        self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.cache_path.with_suffix(".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(self.cache, f, indent=2)
+        os.replace(tmp_path, self.cache_path)
+
+    def age(self) -> Optional[float]:
+        """Seconds since brev was last queried, or None if never."""
+        fetched_at = self.cache.get("fetched_at")
+        return None if fetched_at is None else self.clock() - fetched_at
+
+    def is_stale(self) -> bool:
+        age = self.age()
+        return age is None or age < 0 or age > self.ttl
+
+    def invalidate(self) -> None:
+        """Make the next instances() call query brev, e.g. after starting or stopping instances."""
+        if self.cache.pop("fetched_at", None) is not None:
+            self._write_cache()
+
+    def fetch(self) -> None:
+        """
+        Query brev now and update the cache. A failing brev command raises
+        BrevError and leaves the cache as it was, so an error is never
+        cached as an empty inventory.
+        """
+        self.brev.refresh()
+        self.cache["instances"] = parse_brev_ls(self.brev.ls())
+        self.cache["fetched_at"] = self.clock()
+        self._write_cache()
+
+    def _hosts(self) -> dict[str, str]:
+        """SSH config hosts, re-parsed only when the file changed."""
+        try:
+            stat = self.ssh_config.stat()
+        except FileNotFoundError:
+            return {}
+        cached = self.cache.get("ssh_config") or {}
+        if cached.get("mtime_ns") == stat.st_mtime_ns and cached.get("size") == stat.st_size:
+            return cached.get("hosts", {})
+        hosts = parse_ssh_config(self.ssh_config)
+        self.cache["ssh_config"] = {"mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "hosts": hosts}
+        self._write_cache()
+        return hosts
+
+    def instances(self, refresh: bool = False) -> dict[str, dict]:
+        """
+        Returns dict of {instance_name: {ip, status, build}}, querying brev
+        only when `refresh` is set or the cache is stale.
+        """
+        if refresh or self.is_stale():
+            self.fetch()
+        hosts = self._hosts()
+        return {name: {**data, "ip": hosts.get(name)}
+                for name, data in self.cache.get("instances", {}).items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the cached lab instance inventory")
+    parser.add_argument("--refresh", action="store_true", help="Query brev even if the cache is fresh")
+    parser.add_argument("--ttl", type=float, default=INVENTORY_TTL,
+                        help=f"Seconds before the cache is refreshed (default: {INVENTORY_TTL})")
+    args = parser.parse_args()
+
+    inventory = Inventory(ttl=args.ttl)
+    start = time.perf_counter()
+    try:
+        instances = inventory.instances(refresh=args.refresh)
+    except (BrevError, OSError) as e:
+        print(f"Error: {e}")
+        sys.exit(1)
+    for name, data in sorted(instances.items()):
+        print(f"  {name:<40} {data['status']:<10} {data['build']:<10} {data['ip'] or '-'}")
+    print(f"{len(instances)} instances, cache age {inventory.age():.0f}s "
+          f"({(time.perf_counter() - start) * 1000:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,7 @@ from IPython import get_ipython
 
 def init():
     # 1. Install dependencies if missing (Silent)
-    required_packages = ['pandas', 'openpyxl', 'ipython']
+    required_packages = ['ipython']
     missing = []
     for pkg in required_packages:
         if importlib.util.find_spec(pkg) is None:
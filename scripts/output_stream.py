@@ -0,0 +1,56 @@
+"""
+Output stream - chunked, optionally paced rendering of simulated command output
+"""
+
+import sys
+import time
+
+# Unpaced output is written in chunks of about this size
+CHUNK_BYTES = 8192
+
+# Paced output is grouped into frames this long, so the front end sees a
+# handful of writes per second rather than one per line
+FRAME_SECONDS = 0.1
+
+
+def iter_chunks(output, profile=None):
+    """
+    Yield (text, delay) pairs covering `output` plus a trailing newline.
+    `delay` is how long to wait before writing `text`.
+
+    With no profile the output is split into CHUNK_BYTES pieces at line
+    boundaries. A profile may set `delay` (seconds before the first line)
+    and `lines_per_second`, which releases lines frame by frame.
+    """
+    lines = (output + '\n').splitlines(keepends=True)
+    delay = float(profile.get('delay', 0)) if profile else 0.0
+    rate = float(profile.get('lines_per_second', 0)) if profile else 0.0
+
+    if rate <= 0:
+        chunk = []
+        size = 0
+        for line in lines:
+            chunk.append(line)
+            size += len(line)
+            if size >= CHUNK_BYTES:
+                yield ''.join(chunk), delay
+                chunk, size, delay = [], 0, 0.0
+        if chunk:
+            yield ''.join(chunk), delay
+        return
+
+    per_frame = max(1, round(rate * FRAME_SECONDS))
+    frame_delay = per_frame / rate
+    for start in range(0, len(lines), per_frame):
+        yield ''.join(lines[start:start + per_frame]), delay
+        delay = frame_delay
+
+
+def write_stream(chunks, out=None, sleep=time.sleep):
+    """Write chunks from iter_chunks(), flushing once per chunk."""
+    out = out or sys.stdout
+    for text, delay in chunks:
+        if delay > 0:
+            sleep(delay)
+        out.write(text)
+        out.flush()
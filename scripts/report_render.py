@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Streaming renderers for the lab access report.
+
+The HTML template is split once into literal text and {{NAME}} slots.
+Rendering writes the pieces straight to the output file, and the table
+rows slot takes a generator, so no row is kept after it is written. All
+student data is HTML-escaped. The same assignments can also be written
+as CSV or JSON for LMS import.
+"""
+
+import csv
+import json
+import os
+import re
+from html import escape
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from fleet_probe import describe
+
+REPORT_FORMATS = ("html", "csv", "json")
+
+# Columns of the CSV and keys of each JSON record, in order
+EXPORT_FIELDS = ["full_name", "first_name", "last_name", "email", "instance",
+                 "status", "lab_link", "response_ms", "probe_error"]
+
+SLOT_PATTERN = re.compile(r"\{\{(\w+)\}\}")
+
+
+class Template:
+    """
+    A template compiled into alternating literal text and slot names.
+    render() writes literals as-is. Slot values are written escaped if
+    they are strings, and piece by piece without escaping if they are
+    iterables; iterables are trusted to yield HTML that is already safe.
+    """
+
+    def __init__(self, text: str):
+        parts = SLOT_PATTERN.split(text)
+        # Even indexes are literal text, odd indexes are slot names
+        self.parts = [(i % 2 == 1, part) for i, part in enumerate(parts) if part]
+        self.slots = {part for is_slot, part in self.parts if is_slot}
+
+    @classmethod
+    def load(cls, path: Path) -> "Template":
+        return cls(Path(path).read_text())
+
+    def render(self, out, values: dict) -> None:
+        """Write the template to the file object `out`, filling every slot from `values`."""
+        missing = self.slots - values.keys()
+        if missing:
+            raise KeyError(f"template slots without a value: {', '.join(sorted(missing))}")
+        for is_slot, part in self.parts:
+            if not is_slot:
+                out.write(part)
+                continue
+            value = values[part]
+            if isinstance(value, str):
+                out.write(escape(value))
+            else:
+                for chunk in value:
+                    out.write(chunk)
+
+
+def sorted_by_name(assignments: list[dict]) -> list[dict]:
+    return sorted(assignments, key=lambda a: a["full_name"])
+
+
+def html_rows(assignments: Iterable[dict]) -> Iterator[str]:
+    """One escaped <tr> per assignment, in the order given, separated by newlines."""
+    for i, a in enumerate(assignments):
+        if a["lab_link"]:
+            link = escape(a["lab_link"])
+            link_html = f'<a href="{link}" target="_blank" class="status-{escape(a["status"])}">{link}</a>'
+        elif a["status"] == "unassigned":
+            link_html = '<span class="status-error">No instance assigned</span>'
+        else:
+            link_html = '<span class="status-error">Instance has no address yet</span>'
+
+        probe = a.get("probe")
+        if probe is None:
+            probe_html = '<span class="probe">-</span>'
+        elif probe["ok"]:
+            probe_html = f'<span class="probe status-ready">{probe["http_ms"]:.0f} ms</span>'
+        else:
+            probe_html = f'<span class="probe status-error">{escape(describe(probe))}</span>'
+
+        separator = "\n" if i else ""
+        yield f"""{separator}                    <tr>
+                        <td>{escape(a["full_name"])}</td>
+                        <td>{escape(a["email"])}</td>
+                        <td>{link_html}</td>
+                        <td>{probe_html}</td>
+                    </tr>"""
+
+
+def export_record(assignment: dict) -> dict:
+    """The EXPORT_FIELDS of one assignment, with the probe flattened."""
+    probe = assignment.get("probe")
+    record = {field: assignment.get(field) for field in EXPORT_FIELDS}
+    record["response_ms"] = round(probe["http_ms"]) if probe and probe["ok"] else None
+    record["probe_error"] = describe(probe) if probe and not probe["ok"] else None
+    return record
+
+
+def write_html(out, template: Template, date: str, password: str, assignments: list[dict]) -> None:
+    template.render(out, {
+        "DATE": date,
+        "PASSWORD": password,
+        "TABLE_ROWS": html_rows(sorted_by_name(assignments)),
+    })
+
+
+def write_csv(out, assignments: list[dict]) -> None:
+    writer = csv.DictWriter(out, fieldnames=EXPORT_FIELDS)
+    writer.writeheader()
+    for a in sorted_by_name(assignments):
+        writer.writerow(export_record(a))
+
+
+def write_json(out, assignments: list[dict]) -> None:
+    """A JSON array with one record per line, written as it goes."""
+    out.write("[")
+    for i, a in enumerate(sorted_by_name(assignments)):
+        out.write(",\n " if i else "\n ")
+        out.write(json.dumps(export_record(a)))
+    out.write("\n]\n")
+
+
+def write_report(path: Path, fmt: str, assignments: list[dict], template: Optional[Template] = None,
+                 date: str = "", password: str = "") -> None:
+    """Write one report format to `path`, replacing any previous file only once it is complete."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    # newline="" so the csv module's \r\n row endings are written unchanged
+    with open(tmp_path, "w", encoding="utf-8", newline="" if fmt == "csv" else None) as out:
+        if fmt == "html":
+            write_html(out, template, date, password, assignments)
+        elif fmt == "csv":
+            write_csv(out, assignments)
+        elif fmt == "json":
+            write_json(out, assignments)
+        else:
+            raise ValueError(f"unknown report format {fmt!r}")
+    os.replace(tmp_path, path)
@@ -0,0 +1,422 @@
+"""
+Scenario store - pandas-free storage for DOCA simulator scenarios
+"""
+
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import zlib
+from bisect import bisect_left
+from collections import OrderedDict
+
+from command_index import build_command_index, find_next
+from state_machine import WILDCARD, from_linear, from_transitions
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT_DIR = os.path.dirname(SCRIPT_DIR)
+SCENARIO_DIR = os.path.join(ROOT_DIR, 'dpu simulator')
+DEFAULT_SCENARIO = 'doca_installation_commands'
+DEFAULT_SCENARIO_PATH = os.path.join(SCENARIO_DIR, DEFAULT_SCENARIO + '.csv')
+
+# Upper bound on scenario data kept alive by the process-wide cache
+DEFAULT_CACHE_BYTES = 64 * 1024 * 1024
+
+# Compiled scenario layout (little-endian):
+#   header     magic, version, row count, slot count, source size, source mtime
+#   rows       per row: command offset/length, output offset/length into strings
+#   slots      open-addressed command hash table: crc32, positions start, count
+#   positions  row positions grouped by command, sorted within each group
+#   strings    UTF-8 string table, each distinct string stored once
+COMPILED_SUFFIX = '.scn'
+PACING_SUFFIX = '.pacing.json'
+MAGIC = b'DOCASCN\0'
+FORMAT_VERSION = 1
+HEADER = struct.Struct('<8sIIIQQ')
+ROW = struct.Struct('<IIII')
+SLOT = struct.Struct('<III')
+U32 = struct.Struct('<I')
+
+
+class Scenario:
+    """
+    An ordered list of simulated commands and their outputs.
+    Commands are stored normalized (stripped) alongside a lookup index.
+    """
+    __slots__ = ('commands', 'outputs', 'index', 'nbytes')
+
+    def __init__(self, commands, outputs):
+        self.commands = tuple(commands)
+        self.outputs = tuple(outputs)
+        self.index = build_command_index(self.commands)
+        # Approximate footprint, used by the scenario cache
+        self.nbytes = sum(map(len, self.commands)) + sum(map(len, self.outputs))
+
+    def __len__(self):
+        return len(self.commands)
+
+    def __contains__(self, command):
+        return command in self.index
+
+    def distinct_commands(self):
+        return self.index.keys()
+
+    def find(self, command, start=0):
+        """Row position of the next occurrence of `command` at or after `start`, or None."""
+        return find_next(self.index, command, start)
+
+    def output(self, idx):
+        return self.outputs[idx]
+
+
+def load_csv(path):
+    """Load a two-column (Command, Output) scenario CSV."""
+    commands = []
+    outputs = []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        if not reader.fieldnames or 'Command' not in reader.fieldnames:
+            raise ValueError(f"{path}: missing 'Command' column")
+        for row in reader:
+            commands.append((row['Command'] or '').strip())
+            outputs.append(row.get('Output') or '')
+    return Scenario(commands, outputs)
+
+
+def compiled_path(csv_path):
+    return os.path.splitext(csv_path)[0] + COMPILED_SUFFIX
+
+
+def _hash_command(encoded):
+    return zlib.crc32(encoded)
+
+
+def validate_rows(path):
+    """
+    Read a scenario CSV strictly and return its (command, output) rows.
+    Raises ValueError naming the offending line for anything the
+    simulator could not serve.
+    """
+    rows = []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames != ['Command', 'Output']:
+            raise ValueError(f"{path}: expected columns Command,Output, got {reader.fieldnames}")
+        for row in reader:
+            if None in row or row['Output'] is None:
+                raise ValueError(f"{path}:{reader.line_num}: expected 2 fields")
+            command = row['Command'].strip()
+            if not command:
+                raise ValueError(f"{path}:{reader.line_num}: empty command")
+            rows.append((command, row['Output']))
+    if len(rows) >= 2 ** 32:
+        raise ValueError(f"{path}: too many rows to compile")
+    return rows
+
+
+def compile_scenario(csv_path, output_path=None):
+    """Compile a scenario CSV into the binary format read by MappedScenario."""
+    output_path = output_path or compiled_path(csv_path)
+    st = os.stat(csv_path)
+    rows = validate_rows(csv_path)
+
+    strings = bytearray()
+    string_offsets = {}
+
+    def intern(text):
+        encoded = text.encode('utf-8')
+        if encoded not in string_offsets:
+            string_offsets[encoded] = len(strings)
+            strings.extend(encoded)
+        return string_offsets[encoded], len(encoded)
+
+    row_table = bytearray()
+    for command, output in rows:
+        row_table += ROW.pack(*intern(command), *intern(output))
+
+    index = build_command_index(command for command, _ in rows)
+    slot_count = 1
+    while slot_count < 2 * len(index):
+        slot_count *= 2
+
+    slots = [None] * slot_count
+    positions = bytearray()
+    start = 0
+    for command, command_positions in index.items():
+        crc = _hash_command(command.encode('utf-8'))
+        i = crc & (slot_count - 1)
+        while slots[i] is not None:
+            i = (i + 1) & (slot_count - 1)
+        slots[i] = (crc, start, len(command_positions))
+        for position in command_positions:
+            positions += U32.pack(position)
+        start += len(command_positions)
+
+    slot_table = b''.join(SLOT.pack(*(slot or (0, 0, 0))) for slot in slots)
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(rows), slot_count, st.st_size, st.st_mtime_ns)
+
+    # Write to a temporary file first so running kernels never map a partial file
+    tmp_path = output_path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(header)
+        f.write(row_table)
+        f.write(slot_table)
+        f.write(positions)
+        f.write(strings)
+    os.replace(tmp_path, output_path)
+    return output_path
+
+
+class MappedScenario:
+    """
+    A compiled scenario served straight from a memory-mapped file.
+    Nothing is decoded up front; strings are read from the page cache on
+    demand, so every kernel on the host shares one copy.
+    """
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self._rows, self._slot_count, self.source_size, self.source_mtime_ns = \
+            HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._mm.close()
+            raise ValueError(f"{path}: not a compiled scenario (version {FORMAT_VERSION})")
+        self.nbytes = len(self._mm)
+
+        view = memoryview(self._mm)
+        self._rows_start = HEADER.size
+        slots_start = self._rows_start + self._rows * ROW.size
+        positions_start = slots_start + self._slot_count * SLOT.size
+        self._strings_start = positions_start + self._rows * U32.size
+        # Native 'I' views; the loader only accepts these files on little-endian hosts
+        self._slots = view[slots_start:positions_start].cast('I')
+        self._positions = view[positions_start:self._strings_start].cast('I')
+
+    def __len__(self):
+        return self._rows
+
+    def __contains__(self, command):
+        return self._lookup(command) is not None
+
+    def _string(self, offset, length):
+        start = self._strings_start + offset
+        return self._mm[start:start + length]
+
+    def _row(self, idx):
+        return ROW.unpack_from(self._mm, self._rows_start + idx * ROW.size)
+
+    def _lookup(self, command):
+        """Return (positions start, count) for `command`, or None."""
+        encoded = command.encode('utf-8')
+        crc = _hash_command(encoded)
+        mask = self._slot_count - 1
+        i = crc & mask
+        while True:
+            slot_crc, start, count = self._slots[3 * i:3 * i + 3]
+            if not count:
+                return None
+            if slot_crc == crc:
+                command_offset, command_length, _, _ = self._row(self._positions[start])
+                if self._string(command_offset, command_length) == encoded:
+                    return start, count
+            i = (i + 1) & mask
+
+    def distinct_commands(self):
+        """Each command once, decoded from the hash table rather than every row."""
+        for i in range(self._slot_count):
+            _, start, count = self._slots[3 * i:3 * i + 3]
+            if count:
+                command_offset, command_length, _, _ = self._row(self._positions[start])
+                yield self._string(command_offset, command_length).decode('utf-8')
+
+    def find(self, command, start=0):
+        """Row position of the next occurrence of `command` at or after `start`, or None."""
+        found = self._lookup(command)
+        if found is None:
+            return None
+        lo, count = found
+        i = bisect_left(self._positions, start, lo, lo + count)
+        if i < lo + count:
+            return self._positions[i]
+        return self._positions[lo]
+
+    def output(self, idx):
+        _, _, output_offset, output_length = self._row(idx)
+        return self._string(output_offset, output_length).decode('utf-8')
+
+
+def _load_compiled(csv_path):
+    """The compiled form of `csv_path` if it exists and is up to date, else None."""
+    bin_path = compiled_path(csv_path)
+    if sys.byteorder == 'little' and os.path.exists(bin_path):
+        try:
+            scenario = MappedScenario(bin_path)
+            st = os.stat(csv_path)
+            if (scenario.source_size, scenario.source_mtime_ns) == (st.st_size, st.st_mtime_ns):
+                return scenario
+        except (OSError, ValueError, struct.error):
+            pass
+    return None
+
+
+def load_scenario(csv_path):
+    """
+    Load a linear scenario, preferring its compiled form when it is up to date.
+    A missing, stale or unreadable compiled file falls back to the CSV.
+    """
+    return _load_compiled(csv_path) or load_csv(csv_path)
+
+
+def load_state_machine_csv(path):
+    """
+    Load a state-machine scenario CSV with columns State, Command, Output, Next.
+    State '*' rows apply in every state; an empty Next stays in the same state.
+    """
+    transitions = []
+    commands = []
+    outputs = []
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        missing = {'State', 'Command', 'Output', 'Next'} - set(reader.fieldnames or ())
+        if missing:
+            raise ValueError(f"{path}: missing columns {', '.join(sorted(missing))}")
+        for row in reader:
+            state = (row['State'] or '').strip()
+            command = (row['Command'] or '').strip()
+            if not state or not command:
+                raise ValueError(f"{path}:{reader.line_num}: empty state or command")
+            transitions.append((state, command, (row['Next'] or '').strip() or None))
+            commands.append(command)
+            outputs.append(row['Output'] or '')
+    return from_transitions(transitions, Scenario(commands, outputs))
+
+
+def is_state_machine_csv(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        header = next(csv.reader(f), [])
+    return 'State' in header
+
+
+def load_pacing(csv_path):
+    """
+    Load the optional pacing profiles for a scenario: a JSON object next to
+    the CSV mapping commands to {"delay": seconds, "lines_per_second": rate}.
+    A missing or malformed file just means no pacing.
+    """
+    try:
+        with open(os.path.splitext(csv_path)[0] + PACING_SUFFIX, encoding='utf-8') as f:
+            pacing = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(pacing, dict):
+        return {}
+    return {command.strip(): profile for command, profile in pacing.items() if isinstance(profile, dict)}
+
+
+def load_machine(csv_path):
+    """
+    Load any scenario CSV as a machine. State-machine files are compiled to
+    explicit transition tables; linear files are served through their
+    command index, from their .scn form when it is fresh.
+    """
+    if is_state_machine_csv(csv_path):
+        machine = load_state_machine_csv(csv_path)
+    else:
+        machine = from_linear(load_scenario(csv_path))
+    machine.pacing = load_pacing(csv_path)
+    return machine
+
+
+def migrate_to_state_machine(csv_path, output_path):
+    """
+    Rewrite a linear scenario CSV as an equivalent state-machine CSV.
+    State i lists its expected command (row i) first, then the repeated
+    commands whose next occurrence from state i is not their first one;
+    the wildcard rows reproduce wrap-around. Every repeated command needs
+    a row in each state between its occurrences, so the output grows with
+    rows x repeated commands; it is streamed rather than built in memory.
+    """
+    scenario = load_csv(csv_path)
+    index = scenario.index
+    repeated = [command for command, positions in index.items() if len(positions) > 1]
+    with open(output_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+        writer.writerow(['State', 'Command', 'Output', 'Next'])
+        for state, command in enumerate(scenario.commands):
+            writer.writerow([state, command, scenario.output(state), state + 1])
+            for other in repeated:
+                row = scenario.find(other, state)
+                if other != command and row != index[other][0]:
+                    writer.writerow([state, other, scenario.output(row), row + 1])
+        for command, positions in index.items():
+            writer.writerow([WILDCARD, command, scenario.output(positions[0]), positions[0] + 1])
+    return output_path
+
+
+def scenario_path(name):
+    """Path of the CSV for scenario `name` in the scenario directory."""
+    if not name or os.path.basename(name) != name or name.startswith('.'):
+        raise ValueError(f"Invalid scenario name: {name!r}")
+    return os.path.join(SCENARIO_DIR, name + '.csv')
+
+
+def available_scenarios():
+    """Names of all scenarios in the scenario directory."""
+    try:
+        files = os.listdir(SCENARIO_DIR)
+    except OSError:
+        return []
+    return sorted(os.path.splitext(f)[0] for f in files if f.endswith('.csv'))
+
+
+class ScenarioCache:
+    """
+    Least-recently-used cache of loaded scenarios, bounded by total size.
+    The most recently used scenario is always kept, even if it alone
+    exceeds the budget.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_CACHE_BYTES, loader=load_machine):
+        self.max_bytes = max_bytes
+        self.loader = loader
+        self.nbytes = 0
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, path):
+        return path in self._entries
+
+    def get(self, path):
+        scenario = self._entries.get(path)
+        if scenario is not None:
+            self._entries.move_to_end(path)
+            return scenario
+
+        scenario = self.loader(path)
+        self._entries[path] = scenario
+        self.nbytes += scenario.nbytes
+        self._evict()
+        return scenario
+
+    def _evict(self):
+        while self.nbytes > self.max_bytes and len(self._entries) > 1:
+            _, scenario = self._entries.popitem(last=False)
+            self.nbytes -= scenario.nbytes
+
+    def clear(self):
+        self._entries.clear()
+        self.nbytes = 0
+
+
+# Shared by every simulator in the process
+scenario_cache = ScenarioCache()
+
+
+def get_scenario(name):
+    """Load scenario `name` as a StateMachine through the process-wide cache."""
+    return scenario_cache.get(scenario_path(name))
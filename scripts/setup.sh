@@ -2,7 +2,7 @@
 set -e
 
 echo "Installing Python dependencies..."
-pip install pandas openpyxl ipython
+pip install ipython
 
 echo "Dependencies installed."
 
@@ -1,99 +1,200 @@
-import pandas as pd
 import os
-from IPython.core.magic import (Magics, magics_class, cell_magic)
+import time
+from IPython.core.magic import (Magics, magics_class, cell_magic, line_magic)
+from output_stream import iter_chunks, write_stream
+from scenario_store import DEFAULT_SCENARIO, Scenario, available_scenarios, get_scenario
+from state_machine import from_linear
 
 # Global reference to the active simulator instance
 _active_simulator = None
 
+# Stands in for a scenario that failed to load
+_EMPTY_SCENARIO = from_linear(Scenario((), ()))
+
+# Input transformer counters reported by %doca_stats
+_STAT_KEYS = ('calls', 'hits', 'rejected_token', 'rejected_length', 'misses')
+
+def _new_stats():
+    stats = dict.fromkeys(_STAT_KEYS, 0)
+    stats['seconds'] = 0.0
+    return stats
+
 @magics_class
 class DocaSimulator(Magics):
     def __init__(self, shell):
         super(DocaSimulator, self).__init__(shell)
         global _active_simulator
         _active_simulator = self
-        
-        self.current_index = 0
-        
-        # Load the data
-        current_dir = os.path.dirname(os.path.abspath(__file__))
-        root_dir = os.path.dirname(current_dir)
-        excel_path = os.path.join(root_dir, 'dpu simulator', 'doca_installation_commands.csv')
-        try:
-            self.df = pd.read_csv(excel_path)
-            # Normalize commands for comparison (strip whitespace)
-            if 'Command' in self.df.columns:
-                self.df['Command_Clean'] = self.df['Command'].astype(str).str.strip()
-        except Exception as e:
-            print(f"Error loading csv file: {e}")
-            self.df = pd.DataFrame()
+
+        # Scenarios are loaded on first use through the shared cache, so
+        # registering the extension stays cheap. Each scenario keeps its
+        # own state, so switching back and forth resumes where it left off.
+        self.scenario_name = DEFAULT_SCENARIO
+        self.scenario_states = {}
+        self._load_errors = set()
+        # The active scenario is held here so the input transformer, which
+        # runs on every cell, does not go through the cache each time
+        self._machine = None
+        self._machine_name = None
+        self.stats = _new_stats()
+
+        # Fast mode skips output pacing, e.g. for automated grading runs
+        self.fast = os.environ.get('DOCA_SIM_FAST', '') not in ('', '0')
+
+    @property
+    def scenario(self):
+        if self._machine_name != self.scenario_name:
+            try:
+                self._machine = get_scenario(self.scenario_name)
+            except Exception as e:
+                if self.scenario_name not in self._load_errors:
+                    self._load_errors.add(self.scenario_name)
+                    print(f"Error loading scenario file: {e}")
+                self._machine = _EMPTY_SCENARIO
+            self._machine_name = self.scenario_name
+        return self._machine
+
+    @property
+    def current_state(self):
+        state = self.scenario_states.get(self.scenario_name)
+        return self.scenario.initial if state is None else state
+
+    @current_state.setter
+    def current_state(self, state):
+        self.scenario_states[self.scenario_name] = state
+
+    def _parse_line(self, line):
+        """Split the magic line into (scenario name or None, fast flag, remaining argument)."""
+        args = line.split()
+        scenario_name = None
+        fast = False
+        rest = []
+        i = 0
+        while i < len(args):
+            if args[i] == '--scenario' and i + 1 < len(args):
+                scenario_name = args[i + 1]
+                i += 2
+                continue
+            if args[i].startswith('--scenario='):
+                scenario_name = args[i].split('=', 1)[1]
+            elif args[i] == '--fast':
+                fast = True
+            else:
+                rest.append(args[i])
+            i += 1
+        return scenario_name, fast, ' '.join(rest)
 
     @cell_magic
     def doca(self, line, cell):
         """
         Simulates the output of a command.
-        Usage: 
-          %%doca 
+        Usage:
+          %%doca [--scenario <name>] [--fast] [index]
           <command>
         """
         try:
-            # Check if line argument is an explicit index
+            scenario_name, fast, line = self._parse_line(line)
+            if scenario_name is not None and scenario_name != self.scenario_name:
+                if scenario_name not in available_scenarios():
+                    print(f"Simulation Error: Unknown scenario '{scenario_name}'. "
+                          f"Available: {', '.join(available_scenarios())}")
+                    return
+                self.scenario_name = scenario_name
+
+            # Check if line argument is an explicit row index
             if line and line.strip().isdigit():
                 idx = int(line.strip())
-                self._print_output(idx)
-                self.current_index = idx + 1
+                if self._print_output(idx):
+                    self._advance(self.scenario.row_next[idx])
                 return
 
-            # Otherwise, match command content
+            # Otherwise, match command content, tolerating whitespace,
+            # typographic dashes/quotes and a redundant or missing sudo
             command_to_run = cell.strip()
-            
-            # Search for the command starting from current_index
-            # We look for the *next* occurrence of this command
-            subset = self.df.iloc[self.current_index:]
-            match = subset[subset['Command_Clean'] == command_to_run]
-            
-            if match.empty:
-                # If not found forward, try from beginning (wrap around)
-                subset_all = self.df
-                match_all = subset_all[subset_all['Command_Clean'] == command_to_run]
-                
-                if match_all.empty:
-                    print(f"Simulation Error: Command not found in scenario:\n{command_to_run}")
-                    return
-                else:
-                    # Found earlier in the script, jump there
-                    idx = match_all.index[0]
-            else:
-                # Found in future
-                idx = match.index[0]
-            
+            command = self.scenario.matcher.resolve(command_to_run)
+
+            # Dispatch on the current state's transitions
+            hit = None if command is None else self.scenario.step(self.current_state, command)
+            if hit is None:
+                print(f"Simulation Error: Command not found in scenario:\n{command_to_run}")
+                suggestion = self.scenario.matcher.suggest(command_to_run)
+                if suggestion:
+                    print(f"Did you mean:\n{suggestion}")
+                return
+
             # Execute and advance
-            self._print_output(idx)
-            self.current_index = idx + 1
+            idx, next_state = hit
+            self._print_output(idx, command, fast)
+            self._advance(next_state)
 
         except Exception as e:
             print(f"Error executing simulation: {e}")
 
-    def _print_output(self, idx):
-        if 0 <= idx < len(self.df):
-            output = self.df.iloc[idx]['Output']
-            if pd.isna(output):
-                output = ""
-            # Print exact output
+    def _advance(self, next_state):
+        # A next state of None means the transition stays in place
+        if next_state is not None:
+            self.current_state = next_state
+
+    def _print_output(self, idx, command=None, fast=False):
+        if 0 <= idx < len(self.scenario):
+            output = self.scenario.output(idx)
+            # Stream exact output, paced if the command has a profile
             if output:
-                print(output)
-        else:
-            print(f"Error: Index {idx} out of bounds.")
+                profile = None if fast or self.fast else self.scenario.pacing.get(command)
+                write_stream(iter_chunks(output, profile))
+            return True
+        print(f"Error: Index {idx} out of bounds.")
+        return False
+
+    @line_magic
+    def doca_stats(self, line):
+        """
+        Show input transformer counters.
+        Usage:
+          %doca_stats [reset]
+        """
+        if line.strip() == 'reset':
+            self.stats = _new_stats()
+            return
+        stats = self.stats
+        per_call = stats['seconds'] / stats['calls'] * 1e6 if stats['calls'] else 0.0
+        print("DOCA simulator input transformer")
+        print(f"  Cells checked:      {stats['calls']}")
+        print(f"  Simulated:          {stats['hits']}")
+        print(f"  Rejected (token):   {stats['rejected_token']}")
+        print(f"  Rejected (length):  {stats['rejected_length']}")
+        print(f"  Not in scenario:    {stats['misses']}")
+        print(f"  Time:               {stats['seconds'] * 1e3:.3f} ms total, {per_call:.2f} us/cell")
 
     def is_known_command(self, lines):
         """Check if the cell content matches a known command."""
-        if self.df.empty:
+        # Nothing is loaded until the first %%doca cell, so ordinary cells
+        # run before it never pay for parsing a scenario
+        if self._machine is None:
+            return False
+        matcher = self.scenario.matcher
+        if not lines or not matcher.exact:
             return False
-            
+
+        # Reject most non-simulator cells on the first token of the first
+        # line alone. Only a bounded prefix is split, so long cells cost
+        # no more than short ones.
+        head = lines[0].lstrip()[:matcher.max_token_len + 1].split(None, 1)
+        if head and not matcher.could_match(head[0], matcher.min_len):
+            self.stats['rejected_token'] += 1
+            return False
+
         # Reconstruct the cell content from lines (input_transformer gives list of strings with newlines)
         content = "".join(lines).strip()
-        
-        # Check if this exact command exists in the Excel file
-        return content in self.df['Command_Clean'].values
+        if not matcher.could_match(None, len(content)):
+            self.stats['rejected_length'] += 1
+            return False
+
+        # Check if this command exists in the scenario
+        if matcher.resolve(content) is not None:
+            return True
+        self.stats['misses'] += 1
+        return False
 
 # Input Transformer Function
 def doca_input_transformer(lines):
@@ -101,14 +202,27 @@ def doca_input_transformer(lines):
     Automatically prepends %%doca to cells that match known simulation commands.
     """
     global _active_simulator
-    if _active_simulator and _active_simulator.is_known_command(lines):
+    simulator = _active_simulator
+    if not simulator:
+        return lines
+
+    start = time.perf_counter()
+    known = simulator.is_known_command(lines)
+    stats = simulator.stats
+    stats['calls'] += 1
+    stats['seconds'] += time.perf_counter() - start
+    if known:
         # If the command is known, inject the magic
+        stats['hits'] += 1
         return ['%%doca\n'] + lines
     return lines
 
 def load_ipython_extension(ipython):
     # Register the magic class
     ipython.register_magics(DocaSimulator)
-    
-    # Register the input transformer to handle "magic-less" commands
-    ipython.input_transformers_cleanup.append(doca_input_transformer)
+
+    # Register the input transformer to handle "magic-less" commands,
+    # replacing the one from any earlier %reload_ext
+    transformers = ipython.input_transformers_cleanup
+    transformers[:] = [t for t in transformers if getattr(t, '__name__', None) != 'doca_input_transformer']
+    transformers.append(doca_input_transformer)
@@ -0,0 +1,123 @@
+"""
+State machine - deterministic command dispatch for DOCA simulator scenarios
+"""
+
+from command_match import CommandMatcher
+
+# State name for transitions that apply in every state
+WILDCARD = '*'
+
+# Rough per-transition footprint, used by the scenario cache
+TRANSITION_BYTES = 100
+
+
+class StateMachine:
+    """
+    A State,Command,Output,Next scenario compiled to explicit states.
+    Each state maps a command to
+    (row, next state), where `row` indexes the scenario's output table and a
+    next state of None means "stay". Commands with no transition in the
+    current state fall back to the wildcard transitions.
+    """
+    __slots__ = ('initial', 'states', 'fallback', 'known', 'rows', 'row_next', 'nbytes', 'pacing',
+                 'matcher')
+
+    def __init__(self, initial, states, fallback, rows, row_next):
+        self.initial = initial
+        self.states = states
+        self.fallback = fallback
+        self.rows = rows
+        self.row_next = row_next
+        self.known = set(fallback)
+        for transitions in states.values():
+            self.known.update(transitions)
+        # Maps what a student typed to one of the known commands
+        self.matcher = CommandMatcher(self.known)
+        transition_count = len(fallback) + sum(len(t) for t in states.values())
+        self.nbytes = rows.nbytes + TRANSITION_BYTES * transition_count
+        # Optional per-command output pacing profiles, see output_stream
+        self.pacing = {}
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, command):
+        return command in self.known
+
+    def step(self, state, command):
+        """Return (row, next state) for `command` in `state`, or None."""
+        transitions = self.states.get(state)
+        if transitions is not None:
+            hit = transitions.get(command)
+            if hit is not None:
+                return hit
+        return self.fallback.get(command)
+
+    def output(self, row):
+        return self.rows.output(row)
+
+
+class LinearMachine:
+    """
+    A linear (Command, Output) scenario. The state is the row cursor:
+    state i means "row i is next", and a command dispatches to its next
+    occurrence at or after the cursor, wrapping to its first one. Lookups
+    go through the scenario's own command index (bisect over sorted row
+    positions), so loading builds nothing and memory stays linear in the
+    scenario size. The matcher is built on first use.
+    """
+    __slots__ = ('initial', 'rows', 'row_next', 'nbytes', 'pacing', '_matcher')
+
+    def __init__(self, rows):
+        self.initial = 0
+        self.rows = rows
+        self.row_next = range(1, len(rows) + 1)
+        self.nbytes = rows.nbytes
+        self.pacing = {}
+        self._matcher = None
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __contains__(self, command):
+        return command in self.rows
+
+    @property
+    def matcher(self):
+        if self._matcher is None:
+            self._matcher = CommandMatcher(self.rows.distinct_commands())
+        return self._matcher
+
+    def step(self, state, command):
+        """Return (row, next state) for `command` in `state`, or None."""
+        row = self.rows.find(command, state)
+        return None if row is None else (row, row + 1)
+
+    def output(self, row):
+        return self.rows.output(row)
+
+
+def from_linear(scenario):
+    """Serve a linear scenario (Scenario or MappedScenario) as a machine."""
+    return LinearMachine(scenario)
+
+
+def from_transitions(transitions, rows):
+    """
+    Compile explicit (state, command, next state) transitions, one per row
+    of `rows`. The initial state is the first non-wildcard state listed.
+    Raises ValueError on a duplicate (state, command) pair.
+    """
+    initial = None
+    states = {}
+    fallback = {}
+    row_next = []
+    for row, (state, command, next_state) in enumerate(transitions):
+        table = fallback if state == WILDCARD else states.setdefault(state, {})
+        if command in table:
+            raise ValueError(f"row {row + 1}: duplicate transition for {command!r} in state {state!r}")
+        table[command] = (row, next_state)
+        row_next.append(next_state)
+        if initial is None and state != WILDCARD:
+            initial = state
+    return StateMachine(initial, states, fallback, rows, row_next)
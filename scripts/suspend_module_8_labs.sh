@@ -1,6 +1,5 @@
 #!/bin/bash
 
-# Stop all instances matching the module 8 pattern
+# Stop all instances matching the module 8 pattern, several at a time
 echo "Stopping all module 8 labs..."
-brev ls | grep "lab---module-8---nvidia-driver" | awk '{print $1}' | xargs -I {} sh -c 'echo "Stopping {}..."; brev stop {}'
-echo "All stop commands issued."
+python3 "$(dirname "$0")/fleet.py" stop --match "lab---module-8---nvidia-driver" "$@"
@@ -2,91 +2,219 @@
 Timer - GPU vs CPU performance comparison helper
 """
 
+import json
+import os
 import re
+import statistics
 
-def summary():
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Result records appended by materials/train.py and materials/test.py
+RESULTS_PATH = os.path.join(ROOT_DIR, 'materials', 'results.jsonl')
+
+# Console logs of the Lab 2 runs, scraped when there are no result records
+LEGACY_LOGS = {
+    ('train', 'cuda'): '/tmp/gpu_train.txt',
+    ('train', 'cpu'): '/tmp/cpu_train.txt',
+    ('inference', 'cuda'): '/tmp/gpu_7.txt',
+    ('inference', 'cpu'): '/tmp/cpu_7.txt',
+}
+
+# Columns of the aggregated table: (heading, record field, format)
+METRICS = [
+    ('Seconds', 'seconds', '.2f'),
+    ('Samples/s', 'samples_per_sec', '.0f'),
+    ('Images/s', 'images_per_sec', '.1f'),
+    ('p99 ms', 'latency_p99_ms', '.2f'),
+    ('Accuracy', 'accuracy', '.2f'),
+]
+
+def load_results(paths=None):
+    """Read result records from JSON Lines files, skipping missing files and bad lines."""
+    records = []
+    for path in paths or [RESULTS_PATH]:
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if isinstance(record, dict) and 'kind' in record:
+                        records.append(record)
+        except FileNotFoundError:
+            pass
+    return records
+
+def parse_log(path, kind, device):
+    """Build a result record from the console output of an older run, or None."""
+    try:
+        with open(path, 'r') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    match = re.search(r'Time\s*:\s*([\d.]+)\s*seconds', content)
+    if not match:
+        return None
+    record = {'kind': kind, 'device': device, 'seconds': float(match.group(1)), 'config': {}}
+    # Find highest epoch number
+    epoch_matches = re.findall(r'Train Epoch:\s*(\d+)', content)
+    if epoch_matches:
+        record['epochs'] = max(int(e) for e in epoch_matches)
+    if kind == 'inference':
+        record['images'] = 1
+    return record
+
+def config_key(record):
+    """What makes two runs comparable: their configuration and, for training, the epoch count."""
+    return json.dumps([record.get('epochs'), record.get('config') or {}], sort_keys=True)
+
+def mean_stddev(values):
+    """Mean and sample standard deviation (0 for a single value)."""
+    return statistics.mean(values), statistics.stdev(values) if len(values) > 1 else 0.0
+
+def aggregate(records):
+    """
+    Group records by kind, device, epochs and configuration, in order of
+    first appearance. Each group is a dict with the group fields, the
+    number of runs and, per metric present, (mean, stddev).
+    """
+    groups = {}
+    for record in records:
+        key = (record['kind'], record.get('device'), config_key(record))
+        groups.setdefault(key, []).append(record)
+
+    summaries = []
+    for (kind, device, key), runs in groups.items():
+        epochs, config = json.loads(key)
+        summary = {'kind': kind, 'device': device, 'epochs': epochs, 'config': config, 'runs': len(runs)}
+        for _, field, _ in METRICS:
+            values = [r[field] for r in runs if isinstance(r.get(field), (int, float))]
+            if values:
+                summary[field] = mean_stddev(values)
+        summaries.append(summary)
+    return summaries
+
+def format_config(config):
+    return ', '.join(f'{k}={v}' for k, v in config.items() if v not in (None, False)) or 'default'
+
+def render_table(summaries):
+    """Render aggregated results as a plain-text table; metrics nobody has are left out."""
+    metrics = [m for m in METRICS if any(m[1] in s for s in summaries)]
+    headings = ['Kind', 'Device', 'Epochs', 'Runs'] + [m[0] for m in metrics] + ['Config']
+    rows = []
+    for s in summaries:
+        row = [s['kind'], s['device'] or '?', str(s['epochs'] or '-'), str(s['runs'])]
+        for _, field, fmt in metrics:
+            if field not in s:
+                row.append('-')
+                continue
+            mean, stddev = s[field]
+            row.append(f'{mean:{fmt}}' + (f' ± {stddev:{fmt}}' if s['runs'] > 1 else ''))
+        row.append(format_config(s['config']))
+        rows.append(row)
+    widths = [max(len(r[i]) for r in [headings] + rows) for i in range(len(headings))]
+    lines = ['  '.join(cell.ljust(width) for cell, width in zip(row, widths)).rstrip()
+             for row in [headings] + rows]
+    lines.insert(1, '  '.join('-' * width for width in widths))
+    return '\n'.join(lines)
+
+def table(paths=None):
+    """Print every recorded configuration with mean ± stddev over its repeats."""
+    summaries = aggregate(load_results(paths))
+    if summaries:
+        print(render_table(summaries))
+    else:
+        print("No results recorded yet")
+
+def latest_runs(records, kind, device):
+    """
+    The repeats of the most recent configuration run for (kind, device),
+    falling back to the Lab 2 console log. Inference only counts
+    single-image runs, which is what the lab compares.
+    """
+    matching = [r for r in records if r['kind'] == kind and r.get('device') == device
+                and (kind != 'inference' or r.get('images') == 1)]
+    if matching:
+        key = config_key(matching[-1])
+        return [r for r in matching if config_key(r) == key]
+    record = parse_log(LEGACY_LOGS[(kind, device)], kind, device)
+    return [record] if record else []
+
+def mean_seconds(runs):
+    return statistics.mean(r['seconds'] for r in runs) if runs else None
+
+def repeats(runs):
+    return f" (mean of {len(runs)} runs)" if len(runs) > 1 else ""
+
+def run_epochs(runs):
+    """Epoch count shared by `runs` (latest_runs() only groups equal ones), or None."""
+    return runs[0].get('epochs') if runs else None
+
+def plural_epochs(epochs):
+    return f"{epochs} epoch{'s' if epochs != 1 else ''}"
+
+def summary(paths=None):
     """Display a summary of GPU vs CPU performance for both training and inference."""
+    records = load_results(paths)
+
     print("=" * 60)
     print("           GPU vs CPU Performance Summary")
     print("=" * 60)
-    
+
     # Training results
-    gpu_train_time = None
-    cpu_train_time = None
-    gpu_epochs = None
-    cpu_epochs = None
-    
-    try:
-        with open("/tmp/gpu_train.txt", 'r') as f:
-            content = f.read()
-        match = re.search(r'Time\s*:\s*([\d.]+)\s*seconds', content)
-        if match:
-            gpu_train_time = float(match.group(1))
-        # Find highest epoch number
-        epoch_matches = re.findall(r'Train Epoch:\s*(\d+)', content)
-        if epoch_matches:
-            gpu_epochs = max(int(e) for e in epoch_matches)
-    except FileNotFoundError:
-        pass
-    
-    try:
-        with open("/tmp/cpu_train.txt", 'r') as f:
-            content = f.read()
-        match = re.search(r'Time\s*:\s*([\d.]+)\s*seconds', content)
-        if match:
-            cpu_train_time = float(match.group(1))
-        epoch_matches = re.findall(r'Train Epoch:\s*(\d+)', content)
-        if epoch_matches:
-            cpu_epochs = max(int(e) for e in epoch_matches)
-    except FileNotFoundError:
-        pass
-    
-    # Determine epochs to display
-    epochs = gpu_epochs or cpu_epochs or "?"
-    print(f"\n📊 TRAINING ({epochs} epoch{'s' if epochs != 1 else ''} on MNIST - 60,000 images)")
+    gpu_train = latest_runs(records, 'train', 'cuda')
+    cpu_train = latest_runs(records, 'train', 'cpu')
+    gpu_train_time = mean_seconds(gpu_train)
+    cpu_train_time = mean_seconds(cpu_train)
+
+    # Epochs of the runs averaged above; the speedup only compares equal counts
+    gpu_epochs = run_epochs(gpu_train)
+    cpu_epochs = run_epochs(cpu_train)
+    comparable = not (gpu_epochs and cpu_epochs and gpu_epochs != cpu_epochs)
+    if comparable:
+        epochs = gpu_epochs or cpu_epochs or "?"
+        print(f"\n📊 TRAINING ({plural_epochs(epochs)} on MNIST - 60,000 images)")
+    else:
+        print("\n📊 TRAINING (MNIST - 60,000 images; GPU and CPU ran different epoch counts)")
     print("-" * 60)
-    
+
+    def epoch_note(epochs):
+        return "" if comparable or not epochs else f", {plural_epochs(epochs)}"
+
     if gpu_train_time:
-        print(f"  GPU Training:  {gpu_train_time:>7.1f} seconds")
+        print(f"  GPU Training:  {gpu_train_time:>7.1f} seconds{repeats(gpu_train)}{epoch_note(gpu_epochs)}")
     else:
         print("  GPU Training:  (not yet run)")
-    
+
     if cpu_train_time:
-        print(f"  CPU Training:  {cpu_train_time:>7.1f} seconds")
+        print(f"  CPU Training:  {cpu_train_time:>7.1f} seconds{repeats(cpu_train)}{epoch_note(cpu_epochs)}")
     else:
         print("  CPU Training:  (not yet run)")
-    
-    if gpu_train_time and cpu_train_time:
+
+    if gpu_train_time and cpu_train_time and comparable:
         speedup = cpu_train_time / gpu_train_time
         print(f"\n  ⚡ GPU is {speedup:.1f}x FASTER for training!")
-    
+
     # Inference results
     print("\n📊 INFERENCE (single image prediction)")
     print("-" * 60)
-    
-    gpu_inf_time = None
-    cpu_inf_time = None
-    
-    try:
-        with open("/tmp/gpu_7.txt", 'r') as f:
-            content = f.read()
-        match = re.search(r'Time\s*:\s*([\d.]+)\s*seconds', content)
-        if match:
-            gpu_inf_time = float(match.group(1))
-            print(f"  GPU Inference: {gpu_inf_time:>7.2f} seconds")
-    except FileNotFoundError:
+
+    gpu_inf = latest_runs(records, 'inference', 'cuda')
+    cpu_inf = latest_runs(records, 'inference', 'cpu')
+    gpu_inf_time = mean_seconds(gpu_inf)
+    cpu_inf_time = mean_seconds(cpu_inf)
+
+    if gpu_inf_time:
+        print(f"  GPU Inference: {gpu_inf_time:>7.2f} seconds{repeats(gpu_inf)}")
+    else:
         print("  GPU Inference: (not yet run)")
-    
-    try:
-        with open("/tmp/cpu_7.txt", 'r') as f:
-            content = f.read()
-        match = re.search(r'Time\s*:\s*([\d.]+)\s*seconds', content)
-        if match:
-            cpu_inf_time = float(match.group(1))
-            print(f"  CPU Inference: {cpu_inf_time:>7.2f} seconds")
-    except FileNotFoundError:
+
+    if cpu_inf_time:
+        print(f"  CPU Inference: {cpu_inf_time:>7.2f} seconds{repeats(cpu_inf)}")
+    else:
         print("  CPU Inference: (not yet run)")
-    
+
     if gpu_inf_time and cpu_inf_time:
         if cpu_inf_time < gpu_inf_time:
             speedup = gpu_inf_time / cpu_inf_time
@@ -95,15 +223,22 @@ def summary():
         else:
             speedup = cpu_inf_time / gpu_inf_time
             print(f"\n  ⚡ GPU is {speedup:.1f}x faster for inference")
-    
+
     # Summary
     print("\n" + "=" * 60)
     print("KEY TAKEAWAY:")
     print("-" * 60)
-    if gpu_train_time and cpu_train_time:
+    if gpu_train_time and cpu_train_time and comparable:
         print(f"  • Training: GPU wins big ({cpu_train_time/gpu_train_time:.1f}x faster)")
         print("    → Large datasets benefit from GPU parallelism")
     if gpu_inf_time and cpu_inf_time and cpu_inf_time < gpu_inf_time:
         print(f"  • Inference: CPU faster for single images")
         print("    → GPU data transfer overhead exceeds compute time")
     print("=" * 60)
+
+    # Every recorded configuration, including ones the lab does not compare
+    summaries = aggregate(records)
+    if summaries:
+        print("\n📋 ALL RECORDED RUNS")
+        print("-" * 60)
+        print(render_table(summaries))
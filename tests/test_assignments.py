@@ -0,0 +1,172 @@
+"""
+Tests for scripts/assignments.py: sticky pairings and the loss guard.
+"""
+
+import json
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from assignments import (  # noqa: E402
+    MAX_LOST_FRACTION, AssignmentFileError, AssignmentLossError, AssignmentTable,
+)
+
+
+def student(name: str) -> dict:
+    first, last = name.split()
+    return {"first_name": first, "last_name": last, "full_name": name,
+            "email": f"{first.lower()}@example.com"}
+
+
+ADA, BO, CY, DEE = (student(n) for n in ("Ada L", "Bo M", "Cy N", "Dee O"))
+
+
+def reload(path: Path) -> AssignmentTable:
+    return AssignmentTable(path)
+
+
+@pytest.fixture
+def path(tmp_path):
+    return tmp_path / "assignments.json"
+
+
+def test_fresh_table_pairs_in_name_order(path):
+    table = AssignmentTable(path)
+    changes = table.reconcile([CY, ADA, BO], ["lab-c", "lab-a", "lab-b"])
+    assert table.assignments == {"ada@example.com": "lab-a", "bo@example.com": "lab-b",
+                                 "cy@example.com": "lab-c"}
+    assert [c["event"] for c in changes] == ["assigned"] * 3
+
+
+def test_pairings_stay_sticky_across_runs(path):
+    table = AssignmentTable(path)
+    table.reconcile([ADA, BO], ["lab-a", "lab-b"])
+    table.save()
+
+    # A new instance that sorts first must not shuffle existing students
+    table = reload(path)
+    changes = table.reconcile([ADA, BO], ["lab-0", "lab-a", "lab-b"])
+    assert changes == []
+    assert table.instance_for(ADA) == "lab-a"
+    assert table.instance_for(BO) == "lab-b"
+
+
+def test_new_students_take_free_instances_in_name_order(path):
+    table = AssignmentTable(path)
+    table.reconcile([BO], ["lab-a", "lab-b", "lab-c"])
+    table.save()
+
+    table = reload(path)
+    changes = table.reconcile([BO, DEE, ADA], ["lab-a", "lab-b", "lab-c"])
+    assert table.instance_for(BO) == "lab-a"
+    assert table.instance_for(ADA) == "lab-b"
+    assert table.instance_for(DEE) == "lab-c"
+    assert [(c["event"], c["student"]) for c in changes] == [
+        ("assigned", "ada@example.com"), ("assigned", "dee@example.com")]
+
+
+def test_students_without_a_free_instance_wait(path):
+    table = AssignmentTable(path)
+    table.reconcile([ADA, BO], ["lab-a"])
+    assert table.instance_for(ADA) == "lab-a"
+    assert table.instance_for(BO) is None
+
+
+def test_departed_student_releases_instance(path):
+    table = AssignmentTable(path)
+    table.reconcile([ADA, BO], ["lab-a", "lab-b"])
+    changes = table.reconcile([BO, CY], ["lab-a", "lab-b"])
+    assert [(c["event"], c["student"], c["instance"]) for c in changes] == [
+        ("released", "ada@example.com", "lab-a"), ("assigned", "cy@example.com", "lab-a")]
+    assert table.instance_for(BO) == "lab-b"
+
+
+def test_single_lost_instance_is_repaired(path):
+    table = AssignmentTable(path)
+    table.reconcile([ADA, BO, CY], ["lab-a", "lab-b", "lab-c"])
+    changes = table.reconcile([ADA, BO, CY], ["lab-a", "lab-c", "lab-d"])
+    assert [(c["event"], c["instance"]) for c in changes] == [("lost", "lab-b"), ("assigned", "lab-d")]
+    assert table.instance_for(BO) == "lab-d"
+    assert table.instance_for(ADA) == "lab-a"
+    assert table.instance_for(CY) == "lab-c"
+
+
+def test_email_case_does_not_break_pairing(path):
+    table = AssignmentTable(path)
+    table.reconcile([ADA], ["lab-a"])
+    shouting = {**ADA, "email": " ADA@Example.com "}
+    assert table.reconcile([shouting], ["lab-a"]) == []
+    assert table.instance_for(shouting) == "lab-a"
+
+
+def _saved_table(path) -> bytes:
+    table = AssignmentTable(path)
+    table.reconcile([ADA, BO, CY, DEE], ["lab-a", "lab-b", "lab-c", "lab-d"])
+    table.save()
+    return path.read_bytes()
+
+
+def test_empty_inventory_is_refused(path):
+    before = _saved_table(path)
+    table = reload(path)
+    with pytest.raises(AssignmentLossError):
+        table.reconcile([ADA, BO, CY, DEE], [])
+    assert table.assignments == json.loads(before)["assignments"]
+    assert path.read_bytes() == before
+
+
+def test_mostly_missing_inventory_is_refused(path):
+    before = _saved_table(path)
+    # 3 of 4 assigned instances missing is above MAX_LOST_FRACTION
+    assert 3 > MAX_LOST_FRACTION * 4
+    table = reload(path)
+    with pytest.raises(AssignmentLossError):
+        table.reconcile([ADA, BO, CY, DEE], ["lab-a"])
+    assert len(table.history) == len(json.loads(before)["history"])
+    assert path.read_bytes() == before
+
+
+def test_allow_lost_releases_anyway(path):
+    _saved_table(path)
+    table = reload(path)
+    changes = table.reconcile([ADA, BO, CY, DEE], ["lab-a"], allow_lost=True)
+    assert sum(c["event"] == "lost" for c in changes) == 3
+    assert table.assignments == {"ada@example.com": "lab-a"}
+
+
+def test_departures_do_not_count_as_losses(path):
+    _saved_table(path)
+    table = reload(path)
+    # Three students left along with their instances: not a partial inventory
+    changes = table.reconcile([ADA], ["lab-a"])
+    assert [c["event"] for c in changes] == ["released"] * 3
+
+
+def test_corrupt_file_raises(path):
+    path.write_text('{"assignments": {"ada@exa')
+    with pytest.raises(AssignmentFileError, match=str(path.name)):
+        AssignmentTable(path)
+    path.write_text("[]")
+    with pytest.raises(AssignmentFileError):
+        AssignmentTable(path)
+
+
+def test_cli_reports_corrupt_file(path):
+    path.write_text("{not json")
+    result = subprocess.run([sys.executable, str(SCRIPTS_DIR / "assignments.py"), "--file", str(path)],
+                            capture_output=True, text=True)
+    assert result.returncode == 1
+    assert "Traceback" not in result.stderr
+    assert f"Error: {path} is not valid JSON" in result.stdout
+
+
+def test_no_path_is_never_saved(tmp_path):
+    table = AssignmentTable(None)
+    table.reconcile([ADA], ["lab-a"])
+    table.save()
+    assert list(tmp_path.iterdir()) == []
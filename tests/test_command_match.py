@@ -0,0 +1,50 @@
+"""
+Tests for scripts/command_match.py, including the shipped scenario's
+deliberate en-dash `sudo –i` row.
+"""
+
+import csv
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from command_match import CommandMatcher, normalize  # noqa: E402
+from scenario_store import DEFAULT_SCENARIO_PATH, get_scenario  # noqa: E402
+from simulator_magic import DEFAULT_SCENARIO  # noqa: E402
+
+EN_DASH_SUDO = "sudo –i"
+
+
+def test_scenario_has_both_sudo_i_rows():
+    with open(DEFAULT_SCENARIO_PATH, encoding="utf-8", newline="") as f:
+        commands = [row[0] for row in csv.reader(f) if row]
+    assert EN_DASH_SUDO in commands
+    assert "sudo -i" in commands
+
+
+def test_en_dash_and_hyphen_rows_resolve_to_themselves():
+    matcher = get_scenario(DEFAULT_SCENARIO).matcher
+    assert matcher.resolve(EN_DASH_SUDO) == EN_DASH_SUDO
+    assert matcher.resolve("sudo -i") == "sudo -i"
+    # Other pasted dashes and spacing fold to the plain form
+    assert matcher.resolve("sudo —i") == "sudo -i"
+    assert matcher.resolve("  sudo  -i ") == "sudo -i"
+
+
+def test_normalize_folds_pasted_characters():
+    assert normalize("echo “hi”​  ‘x’") == "echo \"hi\" 'x'"
+
+
+def test_sudo_prefix_is_optional_when_unambiguous():
+    matcher = CommandMatcher(["sudo apt update", "apt install x", "sudo apt install x"])
+    assert matcher.resolve("apt update") == "sudo apt update"
+    assert matcher.resolve("sudo apt install x") == "sudo apt install x"
+    assert matcher.resolve("apt install x") == "apt install x"
+    assert matcher.resolve("apt upgrade") is None
+
+
+def test_suggest_near_miss():
+    matcher = CommandMatcher(["sudo apt update", "sudo minicom -D /dev/rshim0/console"])
+    assert matcher.suggest("sudo minicom -D /dev/rshim0/consol") == "sudo minicom -D /dev/rshim0/console"
+    assert matcher.suggest("ls -la") is None
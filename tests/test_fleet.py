@@ -0,0 +1,116 @@
+"""
+Tests for scripts/fleet.py, run as a subprocess against a stub brev.
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+FLEET = Path(__file__).resolve().parent.parent / "scripts" / "fleet.py"
+
+# Logs every call, lists three instances (one already STOPPED, one RUNNING
+# but outside the module) and fails start/stop for an instance until it
+# has been tried $FAILURES times, or always if $FAILURES is "always".
+STUB_BREV = """\
+#!/bin/sh
+echo "$*" >> "$BREV_LOG"
+case "$1" in
+  ls)
+    echo "You have 4 instances in Org test"
+    echo " NAME                   STATUS   BUILD      SHELL  ID   MACHINE"
+    echo " lab---module-8-ada     RUNNING  COMPLETED  READY  abc  g5"
+    echo " lab---module-8-bo      RUNNING  COMPLETED  READY  abd  g5"
+    echo " lab---module-8-cy      STOPPED  COMPLETED  READY  abe  g5"
+    echo " other-project          RUNNING  COMPLETED  READY  abf  g5"
+    ;;
+  start|stop)
+    tries="$BREV_STATE/$2"
+    echo x >> "$tries"
+    if [ "$FAILURES" = always ] || [ "$(wc -l < "$tries")" -le "${FAILURES:-0}" ]; then
+      echo "error: instance $2 is busy" >&2
+      exit 1
+    fi
+    echo "$1 $2"
+    ;;
+  refresh) echo refreshed ;;
+esac
+"""
+
+
+@pytest.fixture
+def brev(tmp_path):
+    stub = tmp_path / "brev"
+    stub.write_text(STUB_BREV)
+    stub.chmod(0o755)
+    (tmp_path / "state").mkdir()
+    return stub
+
+
+def fleet(brev: Path, *args: str, failures: str = "0") -> tuple[subprocess.CompletedProcess, list[str]]:
+    """Run fleet.py with the stub brev; returns the result and the brev calls made."""
+    tmp = brev.parent
+    log = tmp / "calls.log"
+    env = {**os.environ, "HOME": str(tmp), "BREV_LOG": str(log),
+           "BREV_STATE": str(tmp / "state"), "FAILURES": failures}
+    result = subprocess.run([sys.executable, str(FLEET), *args, "--brev", str(brev), "--backoff", "0"],
+                            capture_output=True, text=True, env=env, timeout=60)
+    calls = log.read_text().splitlines() if log.exists() else []
+    return result, calls
+
+
+def test_status(brev):
+    result, calls = fleet(brev, "status")
+    assert result.returncode == 0
+    assert calls == ["ls"]
+    assert "3 instances: 2 RUNNING, 1 STOPPED" in result.stdout
+    assert "other-project" not in result.stdout
+
+
+def test_stop_skips_instances_already_stopped(brev):
+    result, calls = fleet(brev, "stop")
+    assert result.returncode == 0, result.stdout
+    assert sorted(calls[1:]) == ["stop lab---module-8-ada", "stop lab---module-8-bo"]
+    assert "(1 already STOPPED)" in result.stdout
+    assert "2 ok (0 after retries), 0 failed, 1 skipped" in result.stdout
+
+
+def test_start_only_touches_stopped_instances(brev):
+    result, calls = fleet(brev, "start")
+    assert result.returncode == 0, result.stdout
+    assert calls == ["ls", "start lab---module-8-cy"]
+
+
+def test_retry_then_succeed(brev):
+    result, calls = fleet(brev, "stop", "--retries", "3", failures="2")
+    assert result.returncode == 0, result.stdout
+    assert calls.count("stop lab---module-8-ada") == 3
+    assert calls.count("stop lab---module-8-bo") == 3
+    assert "lab---module-8-ada: stop ok after 3 attempts" in result.stdout
+    assert "2 ok (2 after retries), 0 failed" in result.stdout
+
+
+def test_gives_up_after_max_attempts(brev):
+    result, calls = fleet(brev, "stop", "--retries", "2", "--match", "module-8-ada", failures="always")
+    assert result.returncode == 1
+    assert calls.count("stop lab---module-8-ada") == 3
+    assert "lab---module-8-bo" not in " ".join(calls)
+    assert "FAILED after 3 attempts: error: instance lab---module-8-ada is busy" in result.stdout
+    assert "0 ok (0 after retries), 1 failed" in result.stdout
+
+
+def test_dry_run_issues_no_actions(brev):
+    for command in ("start", "stop"):
+        result, calls = fleet(brev, command, "--dry-run")
+        assert result.returncode == 0
+        assert all(call == "ls" for call in calls)
+    assert f"would run: {brev} stop lab---module-8-ada" in result.stdout
+    assert not any((brev.parent / "state").iterdir())
+
+
+def test_missing_brev_fails_cleanly(tmp_path):
+    result, _ = fleet(tmp_path / "no-such-brev", "status")
+    assert result.returncode == 1
+    assert result.stdout.startswith("Error:")
@@ -0,0 +1,138 @@
+"""
+Tests for scripts/fleet_probe.py against local stand-in servers.
+"""
+
+import asyncio
+import socket
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+from fleet_probe import probe, probe_all, probe_instances  # noqa: E402
+from generate_lab_report import JUPYTER_PORT, match_students_to_instances  # noqa: E402
+
+HOST = "127.0.0.1"
+
+
+def serve(status: int):
+    """Start an HTTP server on an ephemeral port answering every GET with `status`."""
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(status)
+            self.end_headers()
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((HOST, 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture
+def healthy():
+    server = serve(302)
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def failing():
+    server = serve(503)
+    yield server.server_address[1]
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def silent():
+    """A port that accepts connections (via the backlog) but never answers."""
+    sock = socket.socket()
+    sock.bind((HOST, 0))
+    sock.listen(8)
+    yield sock.getsockname()[1]
+    sock.close()
+
+
+@pytest.fixture
+def closed():
+    """A port nothing listens on."""
+    sock = socket.socket()
+    sock.bind((HOST, 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def test_probe_ok(healthy):
+    result = asyncio.run(probe(HOST, healthy, timeout=2))
+    assert result["ok"] and result["status"] == 302 and result["error"] is None
+    assert 0 <= result["tcp_ms"] <= result["http_ms"]
+
+
+def test_probe_5xx(failing):
+    result = asyncio.run(probe(HOST, failing, timeout=2))
+    assert not result["ok"]
+    assert result["status"] == 503
+    assert result["error"] == "HTTP 503"
+
+
+def test_probe_refused(closed):
+    result = asyncio.run(probe(HOST, closed, timeout=2))
+    assert not result["ok"]
+    assert result["status"] is None and result["tcp_ms"] is None
+    assert result["error"] == "Connection refused"
+
+
+def test_probe_timeout(silent):
+    result = asyncio.run(probe(HOST, silent, timeout=0.2))
+    assert not result["ok"]
+    assert result["tcp_ms"] is not None and result["http_ms"] is None
+    assert result["error"] == "timed out after 0.2s"
+
+
+def test_probe_all_bounded(healthy):
+    results = asyncio.run(probe_all([HOST, "localhost"], healthy, timeout=2, concurrency=1))
+    assert set(results) == {HOST, "localhost"}
+    assert all(r["ok"] for r in results.values())
+
+
+def test_probe_instances_dedupes(healthy):
+    results = probe_instances([HOST, HOST], healthy, timeout=2)
+    assert list(results) == [HOST]
+    assert results[HOST]["ok"]
+    assert probe_instances([], healthy) == {}
+
+
+def test_match_marks_unreachable(silent):
+    students = [
+        {"first_name": "Ada", "last_name": "L", "email": "ada@example.com", "full_name": "Ada L"},
+        {"first_name": "Bo", "last_name": "M", "email": "bo@example.com", "full_name": "Bo M"},
+        {"first_name": "Cy", "last_name": "N", "email": "cy@example.com", "full_name": "Cy N"},
+    ]
+    instances = {
+        "lab-a": {"ip": "10.0.0.1", "status": "RUNNING", "build": "COMPLETED"},
+        "lab-b": {"ip": "10.0.0.2", "status": "RUNNING", "build": "COMPLETED"},
+        "lab-c": {"ip": "10.0.0.3", "status": "RUNNING", "build": "BUILDING"},
+    }
+    down = asyncio.run(probe(HOST, silent, timeout=0.1))
+    probes = {
+        "10.0.0.1": {"ok": True, "status": 302, "tcp_ms": 1.0, "http_ms": 2.0, "error": None},
+        "10.0.0.2": down,
+    }
+    by_name = {a["full_name"]: a for a in match_students_to_instances(students, instances, probes)}
+    assert by_name["Ada L"]["status"] == "ready"
+    assert by_name["Bo M"]["status"] == "unreachable"
+    assert by_name["Bo M"]["lab_link"] == f"http://10.0.0.2:{JUPYTER_PORT}"
+    assert by_name["Bo M"]["probe"] is down
+    assert by_name["Cy N"]["status"] == "building"
+    # Without probes a completed build counts as ready
+    without = {a["full_name"]: a for a in match_students_to_instances(students, instances)}
+    assert without["Bo M"]["status"] == "ready"
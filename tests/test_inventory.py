@@ -0,0 +1,200 @@
+"""
+Tests for scripts/inventory.py with a fake brev and a controlled clock.
+"""
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "scripts"))
+
+import inventory  # noqa: E402
+from inventory import BrevError, Inventory  # noqa: E402
+
+LS_OUTPUT = """\
+You have 2 instances in Org NCA-lab
+ NAME                      STATUS   BUILD      SHELL  ID
+ lab---module-8-ada        RUNNING  COMPLETED  READY  abc
+ lab---module-8-bo         STOPPED  COMPLETED  READY  def
+ other-project             RUNNING  COMPLETED  READY  ghi
+"""
+
+SSH_CONFIG = """\
+Host lab---module-8-ada
+  Hostname 10.0.0.1
+Host lab---module-8-ada-host
+  Hostname 192.168.0.1
+Host lab---module-8-bo
+  Hostname 10.0.0.2
+"""
+
+
+class FakeBrev:
+    """Counts calls; `fail` makes the next commands raise BrevError."""
+
+    def __init__(self, output: str = LS_OUTPUT):
+        self.output = output
+        self.calls = []
+        self.fail = False
+
+    def refresh(self):
+        self.calls.append("refresh")
+        if self.fail:
+            raise BrevError("brev refresh failed: not logged in")
+
+    def ls(self):
+        self.calls.append("ls")
+        return self.output
+
+
+class Clock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def brev():
+    return FakeBrev()
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def paths(tmp_path):
+    ssh_config = tmp_path / "ssh_config"
+    ssh_config.write_text(SSH_CONFIG)
+    return tmp_path / "inventory.json", ssh_config
+
+
+def make(brev, clock, paths, ttl=300):
+    cache_path, ssh_config = paths
+    return Inventory(brev=brev, cache_path=cache_path, ttl=ttl, ssh_config=ssh_config, clock=clock)
+
+
+def test_first_call_queries_brev(brev, clock, paths):
+    instances = make(brev, clock, paths).instances()
+    assert brev.calls == ["refresh", "ls"]
+    assert instances == {
+        "lab---module-8-ada": {"status": "RUNNING", "build": "COMPLETED", "ip": "10.0.0.1"},
+        "lab---module-8-bo": {"status": "STOPPED", "build": "COMPLETED", "ip": "10.0.0.2"},
+    }
+
+
+def test_fresh_cache_skips_brev(brev, clock, paths):
+    first = make(brev, clock, paths).instances()
+    brev.calls.clear()
+    clock.now += 299
+    # A new Inventory reads the cache file, as the next report run would
+    assert make(brev, clock, paths).instances() == first
+    assert brev.calls == []
+
+
+def test_stale_cache_is_refetched(brev, clock, paths):
+    make(brev, clock, paths).instances()
+    brev.calls.clear()
+    brev.output = LS_OUTPUT.replace("STOPPED", "RUNNING")
+    clock.now += 301
+    inv = make(brev, clock, paths)
+    assert inv.instances()["lab---module-8-bo"]["status"] == "RUNNING"
+    assert brev.calls == ["refresh", "ls"]
+    assert inv.age() == 0
+
+
+def test_clock_going_backwards_counts_as_stale(brev, clock, paths):
+    make(brev, clock, paths).instances()
+    brev.calls.clear()
+    clock.now -= 10
+    make(brev, clock, paths).instances()
+    assert brev.calls == ["refresh", "ls"]
+
+
+def test_refresh_bypasses_cache(brev, clock, paths):
+    inv = make(brev, clock, paths)
+    inv.instances()
+    brev.calls.clear()
+    inv.instances(refresh=True)
+    assert brev.calls == ["refresh", "ls"]
+
+
+def test_invalidate_forces_next_fetch(brev, clock, paths):
+    make(brev, clock, paths).instances()
+    brev.calls.clear()
+    make(brev, clock, paths).invalidate()
+    make(brev, clock, paths).instances()
+    assert brev.calls == ["refresh", "ls"]
+
+
+def test_ssh_config_reparsed_only_on_change(brev, clock, paths, monkeypatch):
+    _, ssh_config = paths
+    parses = []
+    real_parse = inventory.parse_ssh_config
+    monkeypatch.setattr(inventory, "parse_ssh_config", lambda path: parses.append(path) or real_parse(path))
+
+    make(brev, clock, paths).instances()
+    make(brev, clock, paths).instances()
+    assert len(parses) == 1
+
+    # Same size, new mtime
+    stat = ssh_config.stat()
+    ssh_config.write_text(SSH_CONFIG.replace("10.0.0.2", "10.0.0.9"))
+    os.utime(ssh_config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    assert make(brev, clock, paths).instances()["lab---module-8-bo"]["ip"] == "10.0.0.9"
+    assert len(parses) == 2
+
+    # New size, mtime put back to what the cache last saw
+    stat = ssh_config.stat()
+    ssh_config.write_text(SSH_CONFIG.replace("10.0.0.2", "10.0.0.20"))
+    os.utime(ssh_config, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert make(brev, clock, paths).instances()["lab---module-8-bo"]["ip"] == "10.0.0.20"
+    assert len(parses) == 3
+
+
+def test_missing_ssh_config_leaves_ips_empty(brev, clock, paths):
+    paths[1].unlink()
+    instances = make(brev, clock, paths).instances()
+    assert all(data["ip"] is None for data in instances.values())
+
+
+def test_brev_error_keeps_cache_file(brev, clock, paths):
+    cache_path, _ = paths
+    make(brev, clock, paths).instances()
+    before = cache_path.read_bytes()
+
+    brev.fail = True
+    clock.now += 301
+    with pytest.raises(BrevError):
+        make(brev, clock, paths).instances()
+    with pytest.raises(BrevError):
+        make(brev, clock, paths).instances(refresh=True)
+    assert cache_path.read_bytes() == before
+
+
+def test_brev_error_without_cache_writes_nothing(brev, clock, paths):
+    cache_path, _ = paths
+    brev.fail = True
+    with pytest.raises(BrevError):
+        make(brev, clock, paths).instances()
+    assert not cache_path.exists()
+
+
+def test_corrupt_cache_is_refetched(brev, clock, paths):
+    cache_path, _ = paths
+    cache_path.write_text("{not json")
+    assert len(make(brev, clock, paths).instances()) == 2
+    assert brev.calls == ["refresh", "ls"]
+
+
+def test_brev_cli_raises_on_failure(tmp_path):
+    fake = tmp_path / "brev"
+    fake.write_text("#!/bin/sh\necho 'not logged in' >&2\nexit 1\n")
+    fake.chmod(0o755)
+    with pytest.raises(BrevError, match="brev ls failed: not logged in"):
+        inventory.BrevCLI(str(fake)).ls()
@@ -0,0 +1,57 @@
+"""
+A short CPU run of materials/train.py on a slice of the synthetic data.
+"""
+
+import json
+import math
+import sys
+from pathlib import Path
+
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("torchvision")
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "materials"))
+
+import train  # noqa: E402
+from mnist_data import load_synthetic  # noqa: E402
+
+# Five steps of 64 and two validation batches
+TRAIN_SAMPLES = 320
+TEST_SAMPLES = 128
+
+
+@pytest.fixture
+def small_synthetic(monkeypatch):
+    def load_mnist(source, is_train):
+        assert source == "synthetic"
+        images, labels = load_synthetic(is_train)
+        count = TRAIN_SAMPLES if is_train else TEST_SAMPLES
+        return images[:count], labels[:count]
+
+    monkeypatch.setattr(train, "load_mnist", load_mnist)
+
+
+@pytest.mark.parametrize("preload", [True, False], ids=["preload", "per-sample"])
+def test_bf16_channels_last_cpu_run(tmp_path, monkeypatch, small_synthetic, preload):
+    # The model is saved to the working directory
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(train.torch.cuda, "is_available", lambda: False)
+    argv = ["--data-source", "synthetic", "--amp", "bf16", "--channels-last", "--seed", "0",
+            "--workers", "0", "--telemetry", "telemetry.jsonl", "--telemetry-every", "1",
+            "--results", "results.jsonl"]
+    train.main(train.parse_args(argv + (["--preload"] if preload else [])))
+
+    steps = [json.loads(line) for line in open("telemetry.jsonl")]
+    losses = [r["loss"] for r in steps if r["event"] == "step"]
+    assert len(losses) == TRAIN_SAMPLES // 64
+    assert all(math.isfinite(loss) for loss in losses)
+
+    [record] = [json.loads(line) for line in open("results.jsonl")]
+    assert record["kind"] == "train" and record["device"] == "cpu"
+    assert record["config"]["amp"] == "bf16" and record["config"]["channels_last"]
+    assert record["config"]["preload"] is preload
+    assert record["samples_per_sec"] > 0
+    assert 0 <= record["accuracy"] <= 100
+    assert (tmp_path / "mnist_cnn.pt").exists()